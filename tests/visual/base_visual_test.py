@@ -7,6 +7,7 @@ Provides reusable components for visual regression testing across all pages.
 import os
 import time
 import sys
+import base64
 from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -16,15 +17,19 @@ from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from PIL import Image, ImageChops
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict
 
 
 class BaseVisualTester(ABC):
     """Base class for all visual testing implementations."""
     
-    def __init__(self, base_url="http://localhost:8000", test_name="visual_test", use_test_data=True):
+    def __init__(self, base_url="http://localhost:8000", test_name="visual_test", use_test_data=True,
+                 headless=True):
         self.base_url = base_url
         self.test_name = test_name
         self.use_test_data = use_test_data
+        self.headless = headless
         self.test_dir = Path(__file__).parent
         self.screenshots_dir = self.test_dir / "screenshots"
         self.baseline_dir = self.test_dir / "baseline"
@@ -40,16 +45,23 @@ class BaseVisualTester(ABC):
         
         # Chrome options for consistent testing
         self.chrome_options = Options()
-        self.chrome_options.add_argument("--headless")
+        if headless:
+            self.chrome_options.add_argument("--headless=new")
         self.chrome_options.add_argument("--no-sandbox")
         self.chrome_options.add_argument("--disable-dev-shm-usage")
         self.chrome_options.add_argument("--window-size=1920,1080")
         self.chrome_options.add_argument("--disable-gpu")
+        self.chrome_options.add_argument("--hide-scrollbars")
         self.chrome_options.add_argument("--disable-web-security")
         self.chrome_options.add_argument("--allow-running-insecure-content")
         
         self.driver = None
         
+        # Screenshot files are written in the background while the driver carries on;
+        # the pool is started on first use and shut down by teardown_driver()
+        self._io_pool = None
+        self._pending_writes = []
+        
         # Configuration
         self.default_timeout = 10
         self.similarity_threshold = 95.0
@@ -142,8 +154,30 @@ class BaseVisualTester(ABC):
             print(f"✗ Failed to initialize Chrome WebDriver: {e}")
             return False
     
+    def _queue_write(self, filepath, data):
+        """Write screenshot bytes to filepath on the I/O pool; errors surface in flush_writes()."""
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=4)
+        self._pending_writes.append((filepath, self._io_pool.submit(filepath.write_bytes, data)))
+    
+    def flush_writes(self):
+        """Wait for queued screenshot writes to reach disk, reporting any that failed.
+        
+        Returns True when every write succeeded.
+        """
+        pending, self._pending_writes = self._pending_writes, []
+        wait([future for _, future in pending])
+        failed = [(filepath, future.exception()) for filepath, future in pending if future.exception()]
+        for filepath, error in failed:
+            print(f"✗ Failed to write screenshot {filepath.name}: {error}")
+        return not failed
+    
     def teardown_driver(self):
         """Clean up the WebDriver."""
+        self.flush_writes()
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=True)
+            self._io_pool = None
         if self.driver:
             self.driver.quit()
             print(f"✓ WebDriver cleaned up for {self.test_name}")
@@ -198,17 +232,18 @@ class BaseVisualTester(ABC):
             print(f"✗ Login failed: {e}")
             return False
     
-    def wait_for_page_load(self, selector=None, timeout=None):
+    def wait_for_page_load(self, selector=None, timeout=None, driver=None):
         """Wait for page to fully load."""
         timeout = timeout or self.default_timeout
+        driver = driver or self.driver
         try:
             if selector:
-                WebDriverWait(self.driver, timeout).until(
+                WebDriverWait(driver, timeout).until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, selector))
                 )
             else:
                 # Wait for document ready state
-                WebDriverWait(self.driver, timeout).until(
+                WebDriverWait(driver, timeout).until(
                     lambda driver: driver.execute_script("return document.readyState") == "complete"
                 )
             # Additional wait for dynamic content
@@ -218,18 +253,35 @@ class BaseVisualTester(ABC):
             print(f"✗ Page load timeout after {timeout}s")
             return False
     
-    def take_screenshot(self, filename, description="", directory=None):
+    def take_screenshot_bytes(self, driver=None):
+        """Capture the current viewport as PNG bytes."""
+        driver = driver or self.driver
+        
+        # Chromium drivers expose CDP, where optimizeForSpeed skips the max-compression PNG encode
+        if hasattr(driver, "execute_cdp_cmd"):
+            result = driver.execute_cdp_cmd("Page.captureScreenshot", {
+                "format": "png",
+                "optimizeForSpeed": True,
+                "captureBeyondViewport": False
+            })
+            return base64.b64decode(result["data"])
+        
+        return driver.get_screenshot_as_png()
+    
+    def take_screenshot(self, filename, description="", directory=None, driver=None):
         """Take a screenshot and save it."""
+        driver = driver or self.driver
         try:
             save_dir = directory or self.screenshots_dir
             filepath = save_dir / filename
             
             # Ensure the element is fully loaded and visible
-            self.driver.execute_script("window.scrollTo(0, 0);")
+            driver.execute_script("window.scrollTo(0, 0);")
             time.sleep(1)
             
-            self.driver.save_screenshot(str(filepath))
-            print(f"✓ Screenshot saved: {filename} - {description}")
+            data = self.take_screenshot_bytes(driver)
+            self._queue_write(filepath, data)
+            print(f"✓ Screenshot queued: {filename} - {description}")
             return filepath
         except Exception as e:
             print(f"✗ Failed to take screenshot {filename}: {e}")
@@ -238,6 +290,7 @@ class BaseVisualTester(ABC):
     def compare_images(self, expected_path, actual_path, diff_path=None, threshold=None):
         """Compare two images and return similarity percentage."""
         threshold = threshold or self.similarity_threshold
+        self.flush_writes()
         try:
             if not expected_path.exists():
                 print(f"✗ Expected image not found: {expected_path}")
@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("selenium")
+pytest.importorskip("PIL")
+
+sys.path.insert(0, str(Path(__file__).parent))
+import test_modal_design as tmd
+
+
+@pytest.fixture(params=["numba", "cv2", "numpy"])
+def diff_path(request, monkeypatch):
+    """Force _pixel_similarity down one backend by hiding the faster ones."""
+    if request.param == "numba" and not tmd.HAS_NUMBA:
+        pytest.skip("numba not installed")
+    if request.param == "cv2" and not tmd.HAS_CV2:
+        pytest.skip("opencv not installed")
+    monkeypatch.setattr(tmd, "HAS_NUMBA", request.param == "numba")
+    monkeypatch.setattr(tmd, "HAS_CV2", request.param == "cv2")
+    return request.param
+
+
+@pytest.fixture
+def tester():
+    # Skip __init__ so no browser is needed
+    tester = tmd.ModalVisualTester.__new__(tmd.ModalVisualTester)
+    tester._diff_bufs = {}
+    return tester
+
+
+def page(height=800, width=1280):
+    """A flat page with a blue primary button."""
+    img = np.full((height, width, 3), 245, dtype=np.uint8)
+    img[300:380, 500:629] = (37, 99, 235)
+    return img
+
+
+@pytest.mark.parametrize("use_buffer", [False, True])
+def test_pixel_similarity_counts_differing_pixels(diff_path, use_buffer):
+    a = page(40, 50)
+    b = a.copy()
+    b[0, :10] = (0, 0, 0)
+    b[5, 5, 2] = 1  # a single channel differing still counts the pixel
+
+    out = np.empty_like(a) if use_buffer else None
+    similarity = tmd._pixel_similarity(a, b, out)
+
+    assert similarity == pytest.approx((2000 - 11) / 2000 * 100)
+
+
+def test_pixel_similarity_identical(diff_path):
+    a = page(40, 50)
+    assert tmd._pixel_similarity(a, a.copy(), np.empty_like(a)) == 100.0
+
+
+def test_compare_arrays_identical_pages(diff_path, tester):
+    assert tester._compare_arrays(page(), page()) == 100.0
+
+
+def test_compare_arrays_flags_recoloured_button(diff_path, tester):
+    baseline = page()
+    actual = baseline.copy()
+    actual[300:380, 500:629] = (22, 163, 74)
+
+    assert tester._compare_arrays(baseline, actual) < tmd.SIMILARITY_THRESHOLD
+
+
+def test_compare_arrays_size_mismatch(tester):
+    assert tester._compare_arrays(page(), page(400, 640)) == 0.0
@@ -11,14 +11,21 @@ import threading
 import uuid
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Union
 from contextlib import contextmanager
 import json
+import logging
 import tempfile
 import shutil
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import fcntl
 import signal
+import atexit
+import weakref
+
+# Shared compact encoder for the small lock/session payloads written on every
+# lock acquire and session update; avoids building a new JSONEncoder per call.
+_COMPACT = json.JSONEncoder(separators=(',', ':'), check_circular=False).encode
 
 
 class TestIsolationManager:
@@ -26,6 +33,7 @@ class TestIsolationManager:
     
     def __init__(self, test_env: str = "visual_test"):
         self.test_env = test_env
+        self._log = logging.getLogger('test_isolation')
         self.test_dir = Path(__file__).parent
         self.isolation_dir = self.test_dir / "isolation"
         self.locks_dir = self.isolation_dir / "locks"
@@ -69,34 +77,61 @@ class TestIsolationManager:
         }
         
         with open(self.session_file, 'w') as f:
-            json.dump(session_data, f, indent=2)
+            f.write(_COMPACT(session_data))
+        
+        # Register cleanup without touching process-wide signal handlers:
+        # the finalizer covers a manager that is garbage collected, the
+        # atexit hook runs the full cleanup if it is still alive at exit.
+        self._finalizer = weakref.finalize(
+            self, TestIsolationManager._static_cleanup,
+            self.session_id, str(self.session_file), self.active_locks
+        )
+        self_ref = weakref.ref(self)
+        self._atexit_hook = lambda: TestIsolationManager._atexit_cleanup(self_ref)
+        atexit.register(self._atexit_hook)
+    
+    @staticmethod
+    def _atexit_cleanup(manager_ref):
+        """Run session cleanup at interpreter exit if the manager is still alive."""
+        manager = manager_ref()
+        if manager is not None and manager._finalizer.alive:
+            print(f"\n🧹 Cleaning up test session {manager.session_id}")
+            manager.cleanup_session()
+    
+    @staticmethod
+    def _static_cleanup(session_id: str, session_file: str, active_locks: Dict[str, str]):
+        """Release leftover locks and close the session file without a manager instance."""
+        for lock_file in list(active_locks.values()):
+            try:
+                with open(lock_file, 'r') as f:
+                    if json.load(f).get("session_id") == session_id:
+                        os.remove(lock_file)
+            except Exception:
+                pass
+        active_locks.clear()
         
-        # Register cleanup handler
-        signal.signal(signal.SIGTERM, self.cleanup_handler)
-        signal.signal(signal.SIGINT, self.cleanup_handler)
-    
-    def cleanup_handler(self, signum, frame):
-        """Handle cleanup on process termination."""
-        print(f"\n🧹 Cleaning up test session {self.session_id}")
-        self.cleanup_session()
-        sys.exit(0)
+        try:
+            with open(session_file, 'r') as f:
+                session_data = json.load(f)
+            session_data["status"] = "completed"
+            session_data["ended_at"] = datetime.now().isoformat()
+            with open(session_file, 'w') as f:
+                f.write(_COMPACT(session_data))
+        except Exception:
+            pass
     
     @contextmanager
     def test_isolation(self, test_name: str, resources: List[str] = None):
         """Context manager for test isolation."""
-        resources = resources or []
+        # Sorted, de-duplicated order so concurrent tests never wait on each other in a cycle
+        resources = sorted(set(resources or []))
         
         print(f"🔒 Starting isolated test: {test_name}")
         
         # Acquire resource locks
         acquired_locks = []
         try:
-            for resource in resources:
-                lock_acquired = self.acquire_resource_lock(resource, test_name)
-                if lock_acquired:
-                    acquired_locks.append(resource)
-                else:
-                    raise Exception(f"Could not acquire lock for resource: {resource}")
+            acquired_locks = self.acquire_resource_locks(resources, test_name)
             
             # Set current test
             self.current_test = test_name
@@ -132,17 +167,50 @@ class TestIsolationManager:
             
             print(f"🔓 Test isolation complete: {test_name}")
     
-    def acquire_resource_lock(self, resource: str, test_name: str, timeout: int = None) -> bool:
-        """Acquire a lock for a specific resource."""
-        timeout = timeout or self.lock_timeout
-        lock_file = self.locks_dir / f"{resource}.lock"
+    def acquire_resource_locks(self, resources: List[str], test_name: str, timeout: int = None) -> List[str]:
+        """Acquire locks for all resources or none of them.
         
+        Each attempt takes the locks in the given order without blocking; if any
+        lock is busy, the ones already taken are released and the whole set is
+        retried after a backoff, so a test never holds a lock while waiting.
+        """
+        timeout = timeout or self.lock_timeout
         start_time = time.time()
+        backoff = 0.05
+        lock_paths = [str(self.locks_dir / f"{resource}.lock") for resource in resources]
+        
+        while True:
+            acquired = []
+            for resource, lock_path in zip(resources, lock_paths):
+                if not self.try_acquire_resource_lock(resource, test_name, lock_path):
+                    break
+                acquired.append(resource)
+            else:
+                return acquired
+            
+            # All-or-nothing: give back what we took before waiting
+            for resource in acquired:
+                self.release_resource_lock(resource, test_name)
+            
+            if time.time() - start_time >= timeout:
+                raise Exception(f"Could not acquire lock for resource: {resources[len(acquired)]}")
+            
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 1.0)
+    
+    def try_acquire_resource_lock(self, resource: str, test_name: str, lock_path: str = None) -> bool:
+        """Make a single non-blocking attempt to acquire a resource lock.
         
-        while time.time() - start_time < timeout:
+        Retry loops should pass a precomputed ``lock_path`` so the path is not
+        rebuilt on every attempt.
+        """
+        lock_path = lock_path or str(self.locks_dir / f"{resource}.lock")
+        
+        for _ in range(2):
             try:
                 # Try to create lock file exclusively
-                with open(lock_file, 'x') as f:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+                try:
                     lock_data = {
                         "resource": resource,
                         "test_name": test_name,
@@ -150,26 +218,41 @@ class TestIsolationManager:
                         "acquired_at": datetime.now().isoformat(),
                         "pid": os.getpid()
                     }
-                    json.dump(lock_data, f)
+                    os.write(fd, _COMPACT(lock_data).encode())
+                finally:
+                    os.close(fd)
                 
-                self.active_locks[resource] = lock_file
-                print(f"✓ Acquired lock for resource: {resource}")
+                self.active_locks[resource] = lock_path
+                self._log.debug("Acquired lock for resource: %s", resource)
                 return True
                 
             except FileExistsError:
-                # Lock file exists, check if it's stale
-                if self.is_stale_lock(lock_file):
-                    print(f"⚠️ Removing stale lock for resource: {resource}")
-                    try:
-                        lock_file.unlink()
-                        continue
-                    except:
-                        pass
-                
-                # Wait and retry
-                time.sleep(0.1)
+                # Lock file exists, retry once if it turns out to be stale
+                if not self.is_stale_lock(lock_path):
+                    return False
+                self._log.debug("Removing stale lock for resource: %s", resource)
+                try:
+                    os.remove(lock_path)
+                except:
+                    return False
+        
+        return False
+    
+    def acquire_resource_lock(self, resource: str, test_name: str, timeout: int = None) -> bool:
+        """Acquire a lock for a specific resource."""
+        timeout = timeout or self.lock_timeout
+        lock_path = str(self.locks_dir / f"{resource}.lock")
+        
+        start_time = time.time()
         
-        print(f"✗ Could not acquire lock for resource: {resource} (timeout)")
+        while time.time() - start_time < timeout:
+            if self.try_acquire_resource_lock(resource, test_name, lock_path):
+                return True
+            
+            # Wait and retry
+            time.sleep(0.1)
+        
+        self._log.warning("Could not acquire lock for resource: %s (timeout)", resource)
         return False
     
     def release_resource_lock(self, resource: str, test_name: str):
@@ -186,14 +269,14 @@ class TestIsolationManager:
                     lock_file.unlink()
                     if resource in self.active_locks:
                         del self.active_locks[resource]
-                    print(f"✓ Released lock for resource: {resource}")
+                    self._log.debug("Released lock for resource: %s", resource)
                 else:
-                    print(f"⚠️ Lock not owned by this session: {resource}")
+                    self._log.warning("Lock not owned by this session: %s", resource)
             
         except Exception as e:
-            print(f"⚠️ Error releasing lock for {resource}: {e}")
+            self._log.warning("Error releasing lock for %s: %s", resource, e)
     
-    def is_stale_lock(self, lock_file: Path) -> bool:
+    def is_stale_lock(self, lock_file: Union[str, Path]) -> bool:
         """Check if a lock file is stale (process no longer exists)."""
         try:
             with open(lock_file, 'r') as f:
@@ -258,10 +341,10 @@ class TestIsolationManager:
             
             # Write back
             with open(self.session_file, 'w') as f:
-                json.dump(session_data, f, indent=2)
+                f.write(_COMPACT(session_data))
                 
         except Exception as e:
-            print(f"⚠️ Error updating session data: {e}")
+            self._log.warning("Error updating session data: %s", e)
     
     def register_cleanup_action(self, action_type: str, action_data: Dict[str, Any]):
         """Register a cleanup action to be performed at session end."""
@@ -362,6 +445,10 @@ class TestIsolationManager:
             "ended_at": datetime.now().isoformat()
         })
         
+        # Nothing left for the finalizer or atexit hook to do
+        self._finalizer.detach()
+        atexit.unregister(self._atexit_hook)
+        
         print(f"✓ Session cleanup completed: {self.session_id}")
     
     def get_active_sessions(self) -> List[Dict[str, Any]]:
@@ -384,7 +471,7 @@ class TestIsolationManager:
                             # Mark session as stale
                             session_data["status"] = "stale"
                             with open(session_file, 'w') as f:
-                                json.dump(session_data, f, indent=2)
+                                f.write(_COMPACT(session_data))
                             
             except Exception as e:
                 print(f"⚠️ Error reading session file {session_file}: {e}")
@@ -442,6 +529,45 @@ class TestIsolationManager:
         except Exception:
             return {}
     
+    def _run_isolated_test(self, test_info: Dict[str, Any]):
+        """Run a single test with isolation."""
+        test_name = test_info["name"]
+        test_func = test_info["function"]
+        resources = test_info.get("resources", [])
+        
+        try:
+            with self.test_isolation(test_name, resources) as isolation_context:
+                result = test_func(isolation_context)
+                return test_name, {"status": "passed", "result": result}
+                
+        except Exception as e:
+            return test_name, {"status": "failed", "error": str(e)}
+    
+    def _iter_results(self, future_to_test: Dict[Any, Dict[str, Any]]):
+        """Yield (test_name, result) for each future as soon as it completes."""
+        for future in as_completed(future_to_test):
+            test_name = future_to_test[future]["name"]
+            
+            try:
+                test_name, result = future.result()
+            except Exception as e:
+                result = {"status": "error", "error": str(e)}
+            
+            yield test_name, result
+    
+    def iter_run_tests_with_isolation(self, test_functions: List[Dict[str, Any]],
+                                      max_concurrent: int = 1):
+        """Run multiple tests with proper isolation, yielding results as they complete.
+        
+        Consumers can report or persist each (test_name, result) pair without
+        waiting for the whole batch to finish.
+        """
+        with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+            future_to_test = {executor.submit(self._run_isolated_test, test_info): test_info 
+                            for test_info in test_functions}
+            
+            yield from self._iter_results(future_to_test)
+    
     def run_tests_with_isolation(self, test_functions: List[Dict[str, Any]], 
                                 max_concurrent: int = 1) -> Dict[str, Any]:
         """Run multiple tests with proper isolation."""
@@ -456,44 +582,18 @@ class TestIsolationManager:
             "started_at": datetime.now().isoformat()
         }
         
-        def run_isolated_test(test_info):
-            """Run a single test with isolation."""
-            test_name = test_info["name"]
-            test_func = test_info["function"]
-            resources = test_info.get("resources", [])
+        for test_name, result in self.iter_run_tests_with_isolation(test_functions, max_concurrent):
+            results["test_results"][test_name] = result
             
-            try:
-                with self.test_isolation(test_name, resources) as isolation_context:
-                    result = test_func(isolation_context)
-                    return test_name, {"status": "passed", "result": result}
-                    
-            except Exception as e:
-                return test_name, {"status": "failed", "error": str(e)}
-        
-        # Run tests with thread pool
-        with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
-            future_to_test = {executor.submit(run_isolated_test, test_info): test_info 
-                            for test_info in test_functions}
-            
-            for future in as_completed(future_to_test):
-                test_info = future_to_test[future]
-                test_name = test_info["name"]
-                
-                try:
-                    test_name, result = future.result()
-                    results["test_results"][test_name] = result
-                    
-                    if result["status"] == "passed":
-                        results["passed"] += 1
-                        print(f"✓ {test_name}: PASSED")
-                    else:
-                        results["failed"] += 1
-                        print(f"✗ {test_name}: FAILED - {result.get('error', 'Unknown error')}")
-                        
-                except Exception as e:
-                    results["errors"] += 1
-                    results["test_results"][test_name] = {"status": "error", "error": str(e)}
-                    print(f"✗ {test_name}: ERROR - {e}")
+            if result["status"] == "passed":
+                results["passed"] += 1
+                print(f"✓ {test_name}: PASSED")
+            elif result["status"] == "failed":
+                results["failed"] += 1
+                print(f"✗ {test_name}: FAILED - {result.get('error', 'Unknown error')}")
+            else:
+                results["errors"] += 1
+                print(f"✗ {test_name}: ERROR - {result.get('error', 'Unknown error')}")
         
         results["ended_at"] = datetime.now().isoformat()
         
@@ -5,8 +5,11 @@ Tests the modal design and functionality across different scenarios.
 """
 
 import os
-import time
 import sys
+import base64
+import functools
+import hashlib
+import io
 from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -14,12 +17,169 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from PIL import Image, ImageChops
+from PIL import Image
+import numpy as np
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import imagehash
+    HAS_IMAGEHASH = True
+except ImportError:
+    HAS_IMAGEHASH = False
+
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Minimum similarity (percent) for a screenshot to match its baseline
+SIMILARITY_THRESHOLD = 99.0
+
+# Screenshots whose perceptual hashes differ by more than this many bits (of 64)
+# skip the thumbnail pass and go straight to the full-resolution diff. The hash is
+# only a hint: a whole-page hash can stay unchanged for a recoloured button or a
+# changed label, so matching hashes still get the full pixel check.
+PHASH_MAX_DISTANCE = 0
+
+
+# Decoded baselines live here rather than in baseline/, which CI uploads as an artifact
+BASELINE_CACHE_DIR = Path(os.environ.get("VISUAL_TEST_BASELINE_CACHE", Path(__file__).parent / ".baseline_cache"))
+
+
+def _baseline_key(path):
+    """Cache key for a baseline file: its path and modification time.
+    
+    Regenerating a baseline changes the key, so the per-baseline caches below
+    never serve data for the old file.
+    """
+    return str(path), os.stat(path).st_mtime_ns
+
+
+@functools.lru_cache(maxsize=32)
+def _load_baseline_array(key):
+    """Load a baseline image as an RGB uint8 array.
+    
+    The decoded pixels are kept in a .npy file under BASELINE_CACHE_DIR and
+    memory-mapped on later runs, so the PNG is only decoded again after it changes.
+    """
+    path_str, mtime_ns = key
+    png_path = Path(path_str)
+    path_tag = hashlib.blake2b(str(png_path.resolve()).encode(), digest_size=4).hexdigest()
+    npy_path = BASELINE_CACHE_DIR / f"{png_path.stem}-{path_tag}.npy"
+    
+    if npy_path.exists() and npy_path.stat().st_mtime_ns >= mtime_ns:
+        return np.load(npy_path, mmap_mode="r")
+    
+    arr = np.asarray(Image.open(png_path).convert("RGB"), dtype=np.uint8)
+    try:
+        BASELINE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        np.save(npy_path, arr)
+    except OSError as e:
+        print(f"⚠️ Could not cache decoded baseline {npy_path}: {e}")
+    return arr
+
+
+def _decode_png(data):
+    """Decode PNG bytes into an RGB uint8 array."""
+    return np.asarray(Image.open(io.BytesIO(data)).convert("RGB"), dtype=np.uint8)
+
+
+def _pixel_digest(img_array):
+    """Short hash of an RGB array's decoded pixels and shape.
+    
+    Hashing pixels rather than PNG bytes means two captures that differ only in
+    encoder settings or metadata still match.
+    """
+    digest = hashlib.blake2b(repr(img_array.shape).encode(), digest_size=16)
+    digest.update(np.ascontiguousarray(img_array))
+    return digest.digest()
+
+
+def _phash(img_array):
+    """64-bit perceptual hash of an RGB array."""
+    return imagehash.phash(Image.fromarray(img_array))
+
+
+@functools.lru_cache(maxsize=32)
+def _baseline_phash(key):
+    """Perceptual hash of a baseline, computed from the cached decoded array."""
+    return _phash(_load_baseline_array(key))
+
+
+def _downscale(img_array, scale):
+    """Shrink an RGB array by ``scale`` on each axis for the coarse diff pass."""
+    height, width = img_array.shape[:2]
+    thumb = Image.fromarray(img_array).resize((max(width // scale, 1), max(height // scale, 1)), Image.BILINEAR)
+    return np.asarray(thumb, dtype=np.uint8)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_baseline_thumb(key, scale):
+    """Downscaled copy of a baseline, kept next to the full-resolution array."""
+    return _downscale(_load_baseline_array(key), scale)
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _count_diff_pixels(a, b, tol):
+        """Count pixels where any channel differs by more than ``tol``, without temporaries."""
+        height, width, channels = a.shape
+        count = 0
+        for i in prange(height):
+            for j in range(width):
+                differs = 0
+                for k in range(channels):
+                    if abs(np.int32(a[i, j, k]) - np.int32(b[i, j, k])) > tol:
+                        differs = 1
+                count += differs
+        return count
+
+
+def _pixel_similarity(a, b, out=None):
+    """Percentage of pixels that are identical in every channel.
+    
+    ``out`` is an optional uint8 scratch array shaped like ``a``; a wrapping
+    subtraction into it is non-zero exactly where the channels differ.
+    """
+    if HAS_NUMBA:
+        # JIT-compiled parallel counting loop; compiled once and cached on disk
+        diff_pixels = int(_count_diff_pixels(a, b, 0))
+    elif HAS_CV2:
+        # SIMD absdiff, then the per-pixel channel maximum; exact, unlike a grey conversion
+        diff = cv2.absdiff(a, b, dst=out)
+        diff_pixels = cv2.countNonZero(cv2.reduce(diff.reshape(-1, a.shape[-1]), 1, cv2.REDUCE_MAX))
+    elif out is None:
+        diff_pixels = int(np.count_nonzero(np.any(a != b, axis=-1)))
+    else:
+        np.subtract(a, b, out=out)
+        diff_pixels = int(np.count_nonzero(out.any(axis=-1)))
+    total_pixels = a.shape[0] * a.shape[1]
+    return ((total_pixels - diff_pixels) / total_pixels) * 100
+
+
+@functools.lru_cache(maxsize=32)
+def _baseline_digest(key):
+    """Pixel digest of a baseline, computed from the cached decoded array."""
+    return _pixel_digest(_load_baseline_array(key))
+
 
 class ModalVisualTester:
-    def __init__(self, base_url="http://127.0.0.1:8086"):
+    # Screenshots are first compared at 1/DIFF_SCALE size per axis
+    DIFF_SCALE = 4
+    
+    def __init__(self, base_url="http://127.0.0.1:8086", parallel_viewports=False):
         self.base_url = base_url
+        # Responsive test: resize one browser through the viewports (default) or
+        # start a browser per viewport and capture them concurrently
+        self.parallel_viewports = parallel_viewports
         self.test_dir = Path(__file__).parent
         self.screenshots_dir = self.test_dir / "screenshots"
         self.screenshots_dir.mkdir(exist_ok=True)
@@ -31,14 +191,35 @@ class ModalVisualTester:
         self.chrome_options.add_argument("--disable-dev-shm-usage")
         self.chrome_options.add_argument("--window-size=1920,1080")
         self.chrome_options.add_argument("--disable-gpu")
+        # Skip background subsystems that cost CPU on every page load
+        self.chrome_options.add_argument("--disable-extensions")
+        self.chrome_options.add_argument("--disable-background-networking")
+        self.chrome_options.add_argument("--disable-default-apps")
+        self.chrome_options.add_argument("--disable-sync")
+        self.chrome_options.add_argument("--disable-translate")
+        self.chrome_options.add_argument("--disable-features=TranslateUI,BlinkGenPropertyTrees")
+        self.chrome_options.add_argument("--metrics-recording-only")
+        self.chrome_options.add_argument("--mute-audio")
+        self.chrome_options.add_argument("--no-first-run")
+        # Tests wait explicitly for the elements they need, so DOMContentLoaded is enough
+        self.chrome_options.page_load_strategy = "eager"
         
         self.driver = None
         
+        # Auth cookies captured after login, replayed into any extra drivers
+        self._cookies = None
+        
+        # Scratch diff buffers reused across comparisons, keyed by image shape
+        self._diff_bufs = {}
+        
+        # Decodes captured screenshots while the driver moves on to the next state;
+        # started on first use and shut down by teardown_driver()
+        self._decode_pool = None
+        
     def setup_driver(self):
         """Initialize the Chrome WebDriver."""
         try:
             self.driver = webdriver.Chrome(options=self.chrome_options)
-            self.driver.implicitly_wait(10)
             print("✓ Chrome WebDriver initialized successfully")
             return True
         except Exception as e:
@@ -47,6 +228,9 @@ class ModalVisualTester:
     
     def teardown_driver(self):
         """Clean up the WebDriver."""
+        if self._decode_pool is not None:
+            self._decode_pool.shutdown(wait=True)
+            self._decode_pool = None
         if self.driver:
             self.driver.quit()
             print("✓ WebDriver cleaned up")
@@ -75,6 +259,7 @@ class ModalVisualTester:
             
             # Check if login was successful
             if "login" not in self.driver.current_url:
+                self._cookies = self.driver.get_cookies()
                 print("✓ Login successful")
                 return True
             else:
@@ -85,50 +270,167 @@ class ModalVisualTester:
             print(f"✗ Login failed: {e}")
             return False
     
-    def take_screenshot(self, filename, description=""):
+    def _apply_cookies(self, driver):
+        """Authenticate another driver by replaying the cookies from login()."""
+        # Cookies can only be set for the domain the driver is currently on
+        driver.get(f"{self.base_url}/login")
+        for cookie in self._cookies or []:
+            driver.add_cookie(cookie)
+    
+    def _buttons_with_text(self, text, driver=None):
+        """Find buttons by exact label with one in-browser querySelectorAll."""
+        return (driver or self.driver).execute_script(
+            "return Array.from(document.querySelectorAll('button'))"
+            ".filter(b => b.textContent.trim() === arguments[0])",
+            text
+        )
+    
+    def _view_detail_buttons(self, driver=None):
+        """All 'View Details' buttons on the orders page."""
+        return self._buttons_with_text("View Details", driver)
+    
+    def _close_button(self, driver=None):
+        """The modal's 'Close' button."""
+        buttons = self._buttons_with_text("Close", driver)
+        if not buttons:
+            raise NoSuchElementException("No 'Close' button found")
+        return buttons[0]
+    
+    def _wait_alpine_ready(self, timeout=5, driver=None):
+        """Wait until Alpine.js has loaded and the page has x-data components."""
+        WebDriverWait(driver or self.driver, timeout).until(
+            lambda d: d.execute_script(
+                "return window.Alpine !== undefined && document.querySelectorAll('[x-data]').length > 0"
+            )
+        )
+    
+    def take_screenshot_bytes(self, driver=None):
+        """Capture the current viewport as PNG bytes without touching disk."""
+        # CDP capture with optimizeForSpeed skips Chrome's max-compression PNG encode
+        result = (driver or self.driver).execute_cdp_cmd("Page.captureScreenshot", {
+            "format": "png",
+            "optimizeForSpeed": True,
+            "captureBeyondViewport": False
+        })
+        return base64.b64decode(result["data"])
+    
+    def _capture_and_decode(self):
+        """Capture PNG bytes and start decoding them in the background.
+        
+        Returns (bytes, future) so the driver can move on while the decode runs.
+        """
+        buf = self.take_screenshot_bytes()
+        if self._decode_pool is None:
+            self._decode_pool = ThreadPoolExecutor(max_workers=2)
+        return buf, self._decode_pool.submit(_decode_png, buf)
+    
+    def take_screenshot(self, filename, description="", driver=None):
         """Take a screenshot and save it."""
         try:
             filepath = self.screenshots_dir / filename
-            self.driver.save_screenshot(str(filepath))
+            filepath.write_bytes(self.take_screenshot_bytes(driver))
             print(f"✓ Screenshot saved: {filename} - {description}")
             return filepath
         except Exception as e:
             print(f"✗ Failed to take screenshot {filename}: {e}")
             return None
     
-    def compare_images(self, expected_path, actual_path, diff_path=None):
-        """Compare two images and return similarity percentage."""
+    def _diff_buffer(self, shape):
+        """Return a reusable uint8 buffer for diffs of the given shape."""
+        buf = self._diff_bufs.get(shape)
+        if buf is None:
+            buf = self._diff_bufs[shape] = np.empty(shape, dtype=np.uint8)
+        return buf
+    
+    def _compare_arrays(self, baseline_arr, actual_arr, baseline_key=None, threshold=SIMILARITY_THRESHOLD):
+        """Return the percentage of matching pixels between two RGB arrays.
+        
+        Every pair gets a pixel diff. When imagehash is available, pairs whose
+        perceptual hashes differ are diffed at full resolution straight away, since
+        a thumbnail pass would only add work. ``baseline_key`` lets the baseline hash
+        and thumbnail be served from cache; ``threshold`` is the bar the thumbnail
+        pass must clear.
+        """
+        # Ensure both images have the same size
+        if baseline_arr.shape != actual_arr.shape:
+            print(f"✗ Image sizes don't match: {baseline_arr.shape[1::-1]} vs {actual_arr.shape[1::-1]}")
+            return 0.0
+        
+        likely_changed = False
+        if HAS_IMAGEHASH:
+            baseline_hash = _baseline_phash(baseline_key) if baseline_key else _phash(baseline_arr)
+            likely_changed = baseline_hash - _phash(actual_arr) > PHASH_MAX_DISTANCE
+        
+        if not likely_changed:
+            # Coarse pass on thumbnails: 1/16 of the pixels, and sub-pixel noise averages out
+            if baseline_key:
+                baseline_thumb = _load_baseline_thumb(baseline_key, self.DIFF_SCALE)
+            else:
+                baseline_thumb = _downscale(baseline_arr, self.DIFF_SCALE)
+            similarity = _pixel_similarity(
+                baseline_thumb, _downscale(actual_arr, self.DIFF_SCALE), self._diff_buffer(baseline_thumb.shape)
+            )
+            if similarity >= threshold:
+                return similarity
+        
+        # Thumbnails disagree (or the hashes already did): use the full-resolution diff
+        return _pixel_similarity(baseline_arr, actual_arr, self._diff_buffer(baseline_arr.shape))
+    
+    def _save_diff(self, baseline_arr, actual_arr, diff_path):
+        """Write an amplified per-channel difference image."""
+        diff = np.abs(baseline_arr.astype(np.int16) - actual_arr.astype(np.int16)) * 10
+        Image.fromarray(diff.clip(0, 255).astype(np.uint8)).save(diff_path)
+        print(f"✓ Difference image saved: {diff_path}")
+    
+    def compare_screenshot_to_baseline(self, filename, baseline_path, diff_path, description="",
+                                       threshold=SIMILARITY_THRESHOLD):
+        """Capture the viewport in memory and compare it with a baseline.
+        
+        The screenshot and diff image are only written to disk when the comparison
+        fails, so passing checks do no PNG file I/O. Returns (similarity, diff_saved).
+        """
+        try:
+            return self.compare_bytes_to_baseline(
+                self.take_screenshot_bytes(), filename, baseline_path, diff_path, description, threshold
+            )
+        except Exception as e:
+            print(f"✗ Image comparison failed: {e}")
+            return 0.0, False
+    
+    def compare_bytes_to_baseline(self, buf, filename, baseline_path, diff_path, description="",
+                                  threshold=SIMILARITY_THRESHOLD, actual_arr=None):
+        """Compare already-captured PNG bytes with a baseline, persisting them only on failure.
+        
+        ``actual_arr`` may carry the bytes already decoded (e.g. on a background thread).
+        """
         try:
-            if not expected_path.exists():
-                print(f"✗ Expected image not found: {expected_path}")
-                return 0.0
-            
-            expected = Image.open(expected_path)
-            actual = Image.open(actual_path)
-            
-            # Ensure both images have the same size
-            if expected.size != actual.size:
-                print(f"✗ Image sizes don't match: {expected.size} vs {actual.size}")
-                return 0.0
-            
-            # Calculate difference
-            diff = ImageChops.difference(expected, actual)
-            
-            # Calculate similarity percentage
-            total_pixels = expected.size[0] * expected.size[1]
-            diff_pixels = len(diff.getcolors()) if diff.getcolors() else 0
-            similarity = ((total_pixels - diff_pixels) / total_pixels) * 100
+            baseline_key = _baseline_key(baseline_path) if baseline_path.exists() else None
+            if baseline_key is None:
+                print(f"✗ Expected image not found: {baseline_path}")
+                similarity = 0.0
+                baseline_arr = actual_arr = None
+            else:
+                baseline_arr = _load_baseline_array(baseline_key)
+                if actual_arr is None:
+                    actual_arr = _decode_png(buf)
+                # Pixel-identical images need no diff at all
+                if _pixel_digest(actual_arr) == _baseline_digest(baseline_key):
+                    return 100.0, False
+                similarity = self._compare_arrays(baseline_arr, actual_arr, baseline_key, threshold)
             
-            # Save diff image if requested
-            if diff_path and diff.getbbox():
-                diff.save(diff_path)
-                print(f"✓ Difference image saved: {diff_path}")
+            diff_saved = False
+            if similarity < threshold:
+                (self.screenshots_dir / filename).write_bytes(buf)
+                print(f"✓ Screenshot saved: {filename} - {description}")
+                if baseline_arr is not None and baseline_arr.shape == actual_arr.shape:
+                    self._save_diff(baseline_arr, actual_arr, diff_path)
+                    diff_saved = True
             
-            return similarity
+            return similarity, diff_saved
             
         except Exception as e:
             print(f"✗ Image comparison failed: {e}")
-            return 0.0
+            return 0.0, False
     
     def test_orders_page_load(self):
         """Test that the orders page loads correctly and matches baseline."""
@@ -141,14 +443,15 @@ class ModalVisualTester:
             assert "Order List" in self.driver.page_source
             assert "Alpine.js" in self.driver.page_source
             assert "Tailwind" in self.driver.page_source
-            screenshot_path = self.take_screenshot("orders_page.png", "Orders page loaded")
             # Visual regression check
             baseline_path = self.screenshots_dir.parent / "baseline" / "expected_orders_list.png"
             diff_path = self.screenshots_dir / "diff_orders_page.png"
-            similarity = self.compare_images(baseline_path, screenshot_path, diff_path)
+            similarity, diff_saved = self.compare_screenshot_to_baseline(
+                "orders_page.png", baseline_path, diff_path, "Orders page loaded"
+            )
             print(f"Visual similarity to baseline: {similarity:.2f}%")
-            if similarity < 99.0:
-                print(f"✗ Visual regression detected for orders list page! See diff: {diff_path}")
+            if similarity < SIMILARITY_THRESHOLD:
+                print(f"✗ Visual regression detected for orders list page!" + (f" See diff: {diff_path}" if diff_saved else ""))
                 return False
             print("✓ Orders page loaded and matches baseline")
             return True
@@ -161,10 +464,10 @@ class ModalVisualTester:
         print("\n--- Testing Modal Trigger ---")
         try:
             # Wait for Alpine.js to be ready
-            time.sleep(3)
+            self._wait_alpine_ready()
             
             # Find and click "View Details" button instead of table row
-            view_buttons = self.driver.find_elements(By.XPATH, "//button[contains(text(), 'View Details')]")
+            view_buttons = self._view_detail_buttons()
             if not view_buttons:
                 print("✗ No 'View Details' buttons found")
                 return False
@@ -173,14 +476,15 @@ class ModalVisualTester:
             WebDriverWait(self.driver, 10).until(
                 EC.visibility_of_element_located((By.CSS_SELECTOR, "[x-show='isOpen'], [x-show='true']"))
             )
-            screenshot_path = self.take_screenshot("modal_open.png", "Modal opened")
             # Visual regression check
             baseline_path = self.screenshots_dir.parent / "baseline" / "expected_modal_open.png"
             diff_path = self.screenshots_dir / "diff_modal_open.png"
-            similarity = self.compare_images(baseline_path, screenshot_path, diff_path)
+            similarity, diff_saved = self.compare_screenshot_to_baseline(
+                "modal_open.png", baseline_path, diff_path, "Modal opened"
+            )
             print(f"Visual similarity to baseline: {similarity:.2f}%")
-            if similarity < 99.0:
-                print(f"✗ Visual regression detected for modal open! See diff: {diff_path}")
+            if similarity < SIMILARITY_THRESHOLD:
+                print(f"✗ Visual regression detected for modal open!" + (f" See diff: {diff_path}" if diff_saved else ""))
                 return False
             print("✓ Modal triggered and matches baseline")
             return True
@@ -191,6 +495,17 @@ class ModalVisualTester:
             print(f"✗ Modal trigger failed: {e}")
             return False
 
+    def _check_modal_fields(self):
+        """Return whether the open modal shows every expected order field."""
+        modal_text = self.driver.find_element(By.CSS_SELECTOR, ".fixed.inset-0.z-50").text
+        expected_fields = ["Order ID", "Order Number", "Customer Name", "Item", "Quantity", "Price", "Status"]
+        for field in expected_fields:
+            if field not in modal_text:
+                print(f"✗ Field '{field}' not found in modal")
+                print(f"Modal text: {modal_text[:200]}...")
+                return False
+        return True
+    
     def test_modal_content(self):
         """Test that modal displays order content correctly."""
         print("\n--- Testing Modal Content ---")
@@ -200,20 +515,16 @@ class ModalVisualTester:
                 EC.invisibility_of_element_located((By.CSS_SELECTOR, "[x-show='loading']"))
             )
             
-            # Wait a bit more for content to be fully loaded
-            time.sleep(2)
-            
-            # Get modal content
-            modal_content = self.driver.find_element(By.CSS_SELECTOR, ".fixed.inset-0.z-50")
+            # Wait for the order fields to be rendered into the modal
+            WebDriverWait(self.driver, 10).until(
+                EC.visibility_of_element_located(
+                    (By.XPATH, "//div[@x-show='!loading && orderData']//label[contains(text(), 'Order Number')]")
+                )
+            )
             
             # Verify order fields are present
-            expected_fields = ["Order ID", "Order Number", "Customer Name", "Item", "Quantity", "Price", "Status"]
-            modal_text = modal_content.text
-            for field in expected_fields:
-                if field not in modal_text:
-                    print(f"✗ Field '{field}' not found in modal")
-                    print(f"Modal text: {modal_text[:200]}...")
-                    return False
+            if not self._check_modal_fields():
+                return False
             
             # Take screenshot of modal with content
             self.take_screenshot("modal_with_content.png", "Modal with order content")
@@ -230,7 +541,7 @@ class ModalVisualTester:
         print("\n--- Testing Modal Close ---")
         try:
             # Find and click close button (using Alpine.js @click)
-            close_button = self.driver.find_element(By.XPATH, "//button[contains(text(), 'Close')]")
+            close_button = self._close_button()
             close_button.click()
             
             # Wait for modal to disappear
@@ -248,58 +559,136 @@ class ModalVisualTester:
             print(f"✗ Modal close failed: {e}")
             return False
     
-    def test_responsive_design(self):
-        """Test modal responsiveness on different screen sizes."""
-        print("\n--- Testing Responsive Design ---")
-        screen_sizes = [
-            (1920, 1080, "desktop"),
-            (1366, 768, "laptop"),
-            (768, 1024, "tablet"),
-            (375, 667, "mobile")
-        ]
+    def _capture_viewport(self, width, height, device):
+        """Open the modal in a dedicated browser sized to one viewport and screenshot it."""
+        options = Options()
+        for argument in self.chrome_options.arguments:
+            if not argument.startswith("--window-size="):
+                options.add_argument(argument)
+        options.add_argument(f"--window-size={width},{height}")
+        options.page_load_strategy = self.chrome_options.page_load_strategy
         
+        driver = webdriver.Chrome(options=options)
+        try:
+            print(f"Testing {device} viewport ({width}x{height})...")
+            
+            # Reuse the main session's login instead of submitting the form again
+            self._apply_cookies(driver)
+            
+            # Navigate to orders page
+            driver.get(f"{self.base_url}/orders")
+            
+            # Wait for Alpine.js to be ready
+            self._wait_alpine_ready(driver=driver)
+            
+            # Open modal using View Details button
+            view_buttons = self._view_detail_buttons(driver)
+            if not view_buttons:
+                return False
+            view_buttons[0].click()
+            
+            # Wait for modal
+            WebDriverWait(driver, 10).until(
+                EC.visibility_of_element_located((By.CSS_SELECTOR, "[x-show='isOpen'], [x-show='true']"))
+            )
+            
+            # Take screenshot
+            filename = f"modal_{device}.png"
+            return self.take_screenshot(filename, f"Modal on {device}", driver=driver) is not None
+        finally:
+            driver.quit()
+    
+    def _sweep_viewports_in_place(self, screen_sizes):
+        """Resize a single loaded orders page through each viewport and screenshot the modal."""
         results = []
         
+        # Media queries react to the window size, so one navigation serves every viewport
+        self.driver.get(f"{self.base_url}/orders")
+        self._wait_alpine_ready()
+        
         for width, height, device in screen_sizes:
             try:
                 print(f"Testing {device} viewport ({width}x{height})...")
                 
-                # Set viewport size
                 self.driver.set_window_size(width, height)
-                time.sleep(1)
-                
-                # Navigate to orders page
-                self.driver.get(f"{self.base_url}/orders")
-                
-                # Wait for Alpine.js to be ready
-                time.sleep(3)
+                self.driver.execute_script("window.dispatchEvent(new Event('resize'))")
                 
                 # Open modal using View Details button
-                view_buttons = self.driver.find_elements(By.XPATH, "//button[contains(text(), 'View Details')]")
-                if view_buttons:
-                    view_buttons[0].click()
-                    
-                    # Wait for modal
-                    WebDriverWait(self.driver, 10).until(
-                        EC.visibility_of_element_located((By.CSS_SELECTOR, "[x-show='isOpen'], [x-show='true']"))
-                    )
-                    
-                    # Take screenshot
-                    filename = f"modal_{device}.png"
-                    self.take_screenshot(filename, f"Modal on {device}")
-                    
-                    # Close modal
-                    close_button = self.driver.find_element(By.XPATH, "//button[contains(text(), 'Close')]")
-                    close_button.click()
-                    
-                    results.append((device, True))
-                else:
+                view_buttons = self._view_detail_buttons()
+                if not view_buttons:
                     results.append((device, False))
-                    
+                    continue
+                view_buttons[0].click()
+                
+                # Wait for modal
+                WebDriverWait(self.driver, 10).until(
+                    EC.visibility_of_element_located((By.CSS_SELECTOR, "[x-show='isOpen'], [x-show='true']"))
+                )
+                
+                # Take screenshot
+                filename = f"modal_{device}.png"
+                success = self.take_screenshot(filename, f"Modal on {device}") is not None
+                
+                # Close modal before the next size
+                close_button = self._close_button()
+                close_button.click()
+                WebDriverWait(self.driver, 10).until(
+                    EC.invisibility_of_element_located((By.CSS_SELECTOR, "[x-show='isOpen']"))
+                )
+                
+                results.append((device, success))
+                
             except Exception as e:
                 print(f"✗ {device} test failed: {e}")
                 results.append((device, False))
         
+        # Later tests expect the default desktop window
+        self.driver.set_window_size(1920, 1080)
+        return results
+    
+    def _capture_viewports_concurrently(self, screen_sizes):
+        """Capture every viewport at once, each in its own browser."""
+        results = []
+        
+        with ThreadPoolExecutor(max_workers=len(screen_sizes)) as executor:
+            future_to_device = {
+                executor.submit(self._capture_viewport, width, height, device): device
+                for width, height, device in screen_sizes
+            }
+            
+            for future in as_completed(future_to_device):
+                device = future_to_device[future]
+                try:
+                    results.append((device, future.result()))
+                except Exception as e:
+                    print(f"✗ {device} test failed: {e}")
+                    results.append((device, False))
+        
+        return results
+    
+    def test_responsive_design(self, parallel=None):
+        """Test modal responsiveness on different screen sizes.
+        
+        By default the current browser is resized through the viewports on a single
+        page load. With ``parallel`` (defaulting to ``self.parallel_viewports``) each
+        viewport is captured in its own browser instead.
+        """
+        print("\n--- Testing Responsive Design ---")
+        screen_sizes = [
+            (1920, 1080, "desktop"),
+            (1366, 768, "laptop"),
+            (768, 1024, "tablet"),
+            (375, 667, "mobile")
+        ]
+        
+        if parallel is None:
+            parallel = self.parallel_viewports
+        
+        if parallel:
+            results = self._capture_viewports_concurrently(screen_sizes)
+        else:
+            results = self._sweep_viewports_in_place(screen_sizes)
+        
         # Print results
         for device, success in results:
             status = "✓" if success else "✗"
@@ -317,10 +706,10 @@ class ModalVisualTester:
                 EC.presence_of_element_located((By.TAG_NAME, "table"))
             )
             # Wait for Alpine.js to be ready
-            time.sleep(3)
+            self._wait_alpine_ready()
             
             # Find and click "View Details" button
-            view_buttons = self.driver.find_elements(By.XPATH, "//button[contains(text(), 'View Details')]")
+            view_buttons = self._view_detail_buttons()
             if not view_buttons:
                 print("✗ No 'View Details' buttons found")
                 return False
@@ -329,13 +718,14 @@ class ModalVisualTester:
             WebDriverWait(self.driver, 10).until(
                 EC.visibility_of_element_located((By.CSS_SELECTOR, "[x-show='isOpen'], [x-show='true']"))
             )
-            screenshot_path = self.take_screenshot("modal_mobile.png", "Modal open on mobile")
             baseline_path = self.screenshots_dir.parent / "baseline" / "expected_modal_open_mobile.png"
             diff_path = self.screenshots_dir / "diff_modal_mobile.png"
-            similarity = self.compare_images(baseline_path, screenshot_path, diff_path)
+            similarity, diff_saved = self.compare_screenshot_to_baseline(
+                "modal_mobile.png", baseline_path, diff_path, "Modal open on mobile"
+            )
             print(f"Visual similarity to baseline: {similarity:.2f}%")
-            if similarity < 99.0:
-                print(f"✗ Visual regression detected for mobile modal! See diff: {diff_path}")
+            if similarity < SIMILARITY_THRESHOLD:
+                print(f"✗ Visual regression detected for mobile modal!" + (f" See diff: {diff_path}" if diff_saved else ""))
                 return False
             print("✓ Mobile modal matches baseline")
             return True
@@ -373,30 +763,128 @@ class ModalVisualTester:
                 result = test_func()
                 results.append((test_name, result))
             
-            # Print summary
-            print("\n" + "="*50)
-            print("📊 TEST SUMMARY")
-            print("="*50)
+            return self.print_summary(results)
+            
+        finally:
+            self.teardown_driver()
+    
+    def run_all_tests_batched(self):
+        """Capture every modal state in one page load, then compare them all.
+        
+        Covers the same baseline checks as run_all_tests without re-navigating
+        to /orders and re-booting Alpine.js for each test.
+        """
+        print("🚀 Starting Modal Visual Tests (batched)")
+        print("=" * 50)
+        
+        if not self.setup_driver():
+            return False
+        
+        try:
+            if not self.login():
+                print("✗ Cannot proceed without login")
+                return False
+            
+            modal_selector = (By.CSS_SELECTOR, "[x-show='isOpen'], [x-show='true']")
+            captures = {}
+            results = []
+            
+            try:
+                self.driver.get(f"{self.base_url}/orders")
+                WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "table"))
+                )
+                self._wait_alpine_ready()
+                captures["orders_page"] = self._capture_and_decode()
+                
+                # Desktop modal, before and after its content has loaded
+                self._view_detail_buttons()[0].click()
+                WebDriverWait(self.driver, 10).until(EC.visibility_of_element_located(modal_selector))
+                captures["modal_open"] = self._capture_and_decode()
+                WebDriverWait(self.driver, 10).until(
+                    EC.visibility_of_element_located(
+                        (By.XPATH, "//div[@x-show='!loading && orderData']//label[contains(text(), 'Order Number')]")
+                    )
+                )
+                WebDriverWait(self.driver, 10).until(
+                    EC.invisibility_of_element_located((By.CSS_SELECTOR, "[x-show='loading']"))
+                )
+                captures["modal_with_content"] = self.take_screenshot_bytes()
+                results.append(("Modal Content", self._check_modal_fields()))
+                
+                self._close_button().click()
+                WebDriverWait(self.driver, 10).until(
+                    EC.invisibility_of_element_located((By.CSS_SELECTOR, "[x-show='isOpen']"))
+                )
+                results.append(("Modal Close", True))
+                
+                # Mobile modal on the same page
+                self.driver.set_window_size(375, 667)
+                self._view_detail_buttons()[0].click()
+                WebDriverWait(self.driver, 10).until(EC.visibility_of_element_located(modal_selector))
+                captures["modal_mobile"] = self._capture_and_decode()
+                
+            except Exception as e:
+                print(f"✗ Batched capture failed: {e}")
+                results.append(("Batched Capture", False))
             
-            passed = 0
-            for test_name, result in results:
-                status = "✓ PASS" if result else "✗ FAIL"
-                print(f"{status}: {test_name}")
-                if result:
-                    passed += 1
+            # Compare everything captured against the baselines
+            baseline_dir = self.screenshots_dir.parent / "baseline"
+            checks = [
+                ("Orders Page Load", "orders_page", "expected_orders_list.png"),
+                ("Modal Trigger", "modal_open", "expected_modal_open.png"),
+                ("Mobile Modal Visual Regression", "modal_mobile", "expected_modal_open_mobile.png"),
+            ]
+            for test_name, key, baseline_name in checks:
+                if key not in captures:
+                    results.append((test_name, False))
+                    continue
+                diff_path = self.screenshots_dir / f"diff_{key}.png"
+                buf, decoded = captures[key]
+                try:
+                    similarity, _ = self.compare_bytes_to_baseline(
+                        buf, f"{key}.png", baseline_dir / baseline_name, diff_path, test_name,
+                        actual_arr=decoded.result()
+                    )
+                except Exception as e:
+                    # A bad capture or baseline fails this check only, not the rest of the batch
+                    print(f"✗ {test_name} comparison failed: {e}")
+                    results.append((test_name, False))
+                    continue
+                print(f"{test_name}: visual similarity to baseline: {similarity:.2f}%")
+                results.append((test_name, similarity >= SIMILARITY_THRESHOLD))
             
-            print(f"\nOverall: {passed}/{len(results)} tests passed")
+            if "modal_with_content" in captures:
+                (self.screenshots_dir / "modal_with_content.png").write_bytes(captures["modal_with_content"])
             
-            return passed == len(results)
+            return self.print_summary(results)
             
         finally:
             self.teardown_driver()
+    
+    def print_summary(self, results):
+        """Print the test summary and return whether every test passed."""
+        print("\n" + "="*50)
+        print("📊 TEST SUMMARY")
+        print("="*50)
+        
+        passed = 0
+        for test_name, result in results:
+            status = "✓ PASS" if result else "✗ FAIL"
+            print(f"{status}: {test_name}")
+            if result:
+                passed += 1
+        
+        print(f"\nOverall: {passed}/{len(results)} tests passed")
+        
+        return passed == len(results)
 
 def main():
     """Main function to run the visual tests."""
-    tester = ModalVisualTester()
+    tester = ModalVisualTester(parallel_viewports="--parallel-viewports" in sys.argv)
+    run = tester.run_all_tests_batched if "--batched" in sys.argv else tester.run_all_tests
     
-    if tester.run_all_tests():
+    if run():
         print("\n🎉 All visual tests passed!")
         sys.exit(0)
     else:
@@ -7,17 +7,36 @@ Automatically discovers and runs all visual test modules.
 import sys
 import os
 import importlib
+import importlib.util
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from comprehensive_visual_test import ComprehensiveVisualTester
 
 
+# One runner per worker process, so modules a worker runs again reuse its module cache
+_worker_runner = None
+
+
+def _run_module_in_worker(base_url, module_name):
+    """Run one test module in a worker process, reusing that process's runner."""
+    global _worker_runner
+    if _worker_runner is None or _worker_runner.base_url != base_url:
+        _worker_runner = VisualTestRunner(base_url, max_workers=1)
+    return _worker_runner.run_individual_test_module(module_name)
+
+
 class VisualTestRunner:
     """Advanced test runner that discovers and executes all visual tests."""
     
-    def __init__(self, base_url="http://localhost:8000"):
+    def __init__(self, base_url="http://localhost:8000", max_workers=None):
         self.base_url = base_url
+        # Modules share one server, database and test dataset, and some of them edit
+        # orders others screenshot, so they run one at a time unless parallelism is
+        # asked for (max_workers or VISUAL_TEST_MAX_WORKERS) against an isolated setup
+        self.max_workers = max_workers or int(os.environ.get("VISUAL_TEST_MAX_WORKERS", 0)) or 1
         self.test_dir = Path(__file__).parent
         self.test_results = []
+        self._module_cache = {}
         
     def discover_test_modules(self):
         """Discover all visual test modules."""
@@ -31,25 +50,32 @@ class VisualTestRunner:
         
         return test_modules
     
-    def run_individual_test_module(self, module_name):
-        """Run a specific visual test module."""
-        print(f"\n{'='*20} Running {module_name} {'='*20}")
-        
-        try:
+    def _load_module(self, module_name):
+        """Import a test module once and return (module, tester_class)."""
+        if module_name not in self._module_cache:
             # Import the module dynamically
             spec = importlib.util.spec_from_file_location(module_name, self.test_dir / f"{module_name}.py")
             module = importlib.util.module_from_spec(spec)
             spec.loader.exec_module(module)
             
             # Find the tester class (should end with 'VisualTester')
-            tester_class = None
-            for attr_name in dir(module):
-                attr = getattr(module, attr_name)
-                if (isinstance(attr, type) and 
-                    attr_name.endswith('VisualTester') and 
-                    attr_name != 'BaseVisualTester'):
-                    tester_class = attr
-                    break
+            tester_class = next(
+                (getattr(module, name) for name in dir(module)
+                 if name.endswith('VisualTester') and name != 'BaseVisualTester'
+                 and isinstance(getattr(module, name), type)),
+                None
+            )
+            
+            self._module_cache[module_name] = (module, tester_class)
+        
+        return self._module_cache[module_name]
+    
+    def run_individual_test_module(self, module_name):
+        """Run a specific visual test module."""
+        print(f"\n{'='*20} Running {module_name} {'='*20}")
+        
+        try:
+            module, tester_class = self._load_module(module_name)
             
             if not tester_class:
                 print(f"✗ No tester class found in {module_name}")
@@ -81,10 +107,29 @@ class VisualTestRunner:
         for module in test_modules:
             print(f"  - {module}")
         
-        # Run each test module
+        results = {}
+        max_workers = min(len(test_modules), self.max_workers)
+        if max_workers <= 1:
+            for module_name in test_modules:
+                results[module_name] = self.run_individual_test_module(module_name)
+        else:
+            # Opt-in: one process (and browser) per module
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                future_to_module = {
+                    executor.submit(_run_module_in_worker, self.base_url, module_name): module_name
+                    for module_name in test_modules
+                }
+                
+                for future in as_completed(future_to_module):
+                    module_name = future_to_module[future]
+                    try:
+                        results[module_name] = future.result()
+                    except Exception as e:
+                        print(f"✗ Failed to run {module_name}: {e}")
+                        results[module_name] = False
+        
         for module_name in test_modules:
-            result = self.run_individual_test_module(module_name)
-            self.test_results.append((module_name, result))
+            self.test_results.append((module_name, results[module_name]))
         
         # Print summary
         self.print_summary()
@@ -124,20 +169,7 @@ class VisualTestRunner:
             print(f"\n--- Creating baselines for {module_name} ---")
             
             try:
-                # Import the module
-                spec = importlib.util.spec_from_file_location(module_name, self.test_dir / f"{module_name}.py")
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                
-                # Find the tester class
-                tester_class = None
-                for attr_name in dir(module):
-                    attr = getattr(module, attr_name)
-                    if (isinstance(attr, type) and 
-                        attr_name.endswith('VisualTester') and 
-                        attr_name != 'BaseVisualTester'):
-                        tester_class = attr
-                        break
+                module, tester_class = self._load_module(module_name)
                 
                 if tester_class:
                     tester = tester_class(self.base_url)
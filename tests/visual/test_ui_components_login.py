@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("selenium")
+pytest.importorskip("httpx")
+
+sys.path.insert(0, str(Path(__file__).parent))
+from ui_components_visual_test import UIComponentsVisualTester
+
+
+class FakeDriver:
+    def __init__(self):
+        self.current_url = "http://localhost:8000/"
+        self.cookies = [{"name": "session", "value": "abc"}]
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+
+def make_tester(login_result):
+    # Skip __init__ so no browser or test data is needed
+    tester = UIComponentsVisualTester.__new__(UIComponentsVisualTester)
+    tester.driver = FakeDriver()
+    tester._auth_cookies = None
+    tester.login_calls = 0
+
+    def fake_login():
+        tester.login_calls += 1
+        return login_result
+
+    tester.login = fake_login
+    return tester
+
+
+def test_ensure_login_first_login_caches_cookies():
+    tester = make_tester(login_result=True)
+
+    assert tester.ensure_login() is True
+    assert tester.login_calls == 1
+    assert tester._auth_cookies == [{"name": "session", "value": "abc"}]
+
+
+def test_ensure_login_first_login_failure():
+    tester = make_tester(login_result=False)
+
+    assert tester.ensure_login() is False
+    assert tester.login_calls == 1
+    assert tester._auth_cookies is None
@@ -0,0 +1,143 @@
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("jinja2")
+
+sys.path.insert(0, str(Path(__file__).parent))
+import visual_test_reporter as vtr
+
+# Aliased so pytest does not try to collect the dataclass as a test class
+Result = vtr.TestResult
+
+
+@pytest.fixture
+def reporter(tmp_path):
+    reporter = vtr.VisualTestReporter("pytest", reports_dir=tmp_path)
+    yield reporter
+    reporter.close()
+
+
+def make_results(count):
+    statuses = ["passed", "passed", "failed", "error"]
+    results = []
+    for i in range(count):
+        results.append(Result(
+            test_name=f"test_{i}",
+            page_name=f"page_{i % 3}",
+            device=["desktop", "tablet", "mobile"][i % 3 - 1],
+            status=statuses[i % len(statuses)],
+            # Zero similarities and durations are left out of the averages
+            similarity=0.0 if i % 5 == 0 else 80.0 + (i % 20),
+            duration=0.0 if i % 7 == 0 else 0.25 * (i % 8),
+            timestamp=f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}",
+        ))
+    return results
+
+
+def stored_rows(reporter, session_id):
+    with sqlite3.connect(str(reporter.db_path)) as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM test_results WHERE test_session_id = ?", (session_id,)
+        ).fetchone()[0]
+
+
+def assert_stats_equal(sql_stats, python_stats):
+    assert sql_stats.keys() == python_stats.keys()
+    for key, value in python_stats.items():
+        assert sql_stats[key] == pytest.approx(value), key
+
+
+def test_sql_stats_match_python_stats(reporter):
+    session_id = reporter.start_test_session()
+    results = make_results(120)
+    for result in results:
+        reporter.record_test_result(session_id, result)
+    reporter.end_test_session(session_id)
+
+    assert_stats_equal(reporter._summary_stats_sql(session_id), reporter.calculate_summary_stats(results))
+
+    for sql_stats, python_stats in [
+        (reporter._device_stats_sql(session_id), reporter.calculate_device_stats(results)),
+        (reporter._page_stats_sql(session_id), reporter.calculate_page_stats(results)),
+    ]:
+        assert sql_stats.keys() == python_stats.keys()
+        for group in python_stats:
+            assert_stats_equal(sql_stats[group], python_stats[group])
+
+
+def test_buffered_rows_appear_after_flush(reporter):
+    session_id = reporter.start_test_session()
+    for result in make_results(3):
+        reporter.record_test_result(session_id, result)
+
+    assert stored_rows(reporter, session_id) == 0
+
+    reporter.flush_results()
+
+    assert stored_rows(reporter, session_id) == 3
+
+
+def test_full_batch_is_written_without_explicit_flush(reporter):
+    session_id = reporter.start_test_session()
+    for result in make_results(vtr.RESULT_BATCH_SIZE):
+        reporter.record_test_result(session_id, result)
+
+    assert stored_rows(reporter, session_id) == vtr.RESULT_BATCH_SIZE
+
+
+def test_results_without_timestamp_keep_their_record_time(reporter):
+    session_id = reporter.start_test_session()
+    reporter.record_test_result(session_id, Result("a", "page", "desktop", "passed"))
+    time.sleep(0.01)
+    reporter.record_test_result(session_id, Result("b", "page", "desktop", "passed"))
+    reporter.flush_results()
+
+    first, second = (datetime.fromisoformat(r.timestamp) for r in reporter.get_session_results(session_id))
+    assert first < second
+
+
+def test_concurrent_writers_and_readers(reporter):
+    session_id = reporter.start_test_session()
+    writers, rows_per_writer = 4, 400
+    errors = []
+    done = threading.Event()
+
+    def write(worker):
+        try:
+            for i in range(rows_per_writer):
+                reporter.record_test_result(session_id, Result(
+                    f"w{worker}_{i}", "page", "desktop", "passed", similarity=99.0, duration=0.1
+                ))
+        except Exception as e:
+            errors.append(e)
+
+    def read():
+        try:
+            while not done.is_set():
+                context = reporter.load_context(session_id)
+                assert len(context["test_results"]) <= writers * rows_per_writer
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+    for thread in readers + threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    reporter.end_test_session(session_id)
+
+    assert errors == []
+    assert stored_rows(reporter, session_id) == writers * rows_per_writer
+    assert reporter.performance_metrics["total_tests"] == writers * rows_per_writer
+    assert reporter._summary_stats_sql(session_id)["passed_tests"] == writers * rows_per_writer
@@ -4,10 +4,17 @@ UI Components Visual Regression Tests
 Tests navigation, buttons, forms, and other UI components for visual consistency.
 """
 
+import os
 import sys
 import time
+import queue
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import httpx
 from base_visual_test import BaseVisualTester
+from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -15,13 +22,269 @@ from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 
+# Form controls counted by _form_inventory, keyed by the names used in screenshot files
+FORM_FIELD_SELECTORS = {
+    'text_inputs': "input[type='text'], input[type='email'], input[type='password']",
+    'number_inputs': "input[type='number']",
+    'select_fields': "select",
+    'textareas': "textarea",
+    'labels': "label",
+    'submit_buttons': "button[type='submit'], input[type='submit']",
+}
+
+
+# Elements that show a form error; the app's templates render errors as red text
+ERROR_MESSAGE_SELECTOR = ".error, .alert, .alert-danger, [role=alert], [class*='error'], .text-red-600"
+
+# Named selectors served by the in-page window.__vt_q helper
+VT_SELECTORS = {
+    'buttons': "button, .btn, input[type='submit']",
+    'nav': "nav, header, .navbar, .nav",
+    'loading': ".loading, .spinner, [class*='load']",
+    'responsive': "[class*='responsive'], [class*='mobile'], [class*='tablet'], [class*='desktop']",
+    'error': ERROR_MESSAGE_SELECTOR,
+}
+
+# Installs window.__vt_q on first use in each document, then runs one named query
+VT_QUERY_SCRIPT = """
+if (!window.__vt_q) {
+    window.__vt_sel = arguments[0];
+    window.__vt_q = key => document.querySelectorAll(window.__vt_sel[key]);
+}
+const nodes = window.__vt_q(arguments[1]);
+return arguments[2] ? nodes.length : Array.from(nodes);
+"""
+
+
 class UIComponentsVisualTester(BaseVisualTester):
     """Visual regression tests for UI components."""
     
-    def __init__(self, base_url="http://localhost:8000"):
-        super().__init__(base_url, "UI Components")
+    def __init__(self, base_url="http://localhost:8000", headless=True):
+        super().__init__(base_url, "UI Components", headless=headless)
         self.requires_login = False  # Test both authenticated and non-authenticated components
         
+        # Session cookies from the first successful login, replayed by later tests
+        self._auth_cookies = None
+        
+        # Time each (page, viewport) was last loaded, so back-to-back visits can skip reloading
+        self._page_cache = {}
+        self._current_viewport = 'desktop'
+        self.page_cache_ttl = 30
+        
+        # True when run_page_specific_tests started the driver itself and must quit it
+        self._owned_driver = False
+        
+        # Intermediate-state captures kept in memory; written out only if their test fails
+        self._screenshot_ring = OrderedDict()
+        self.screenshot_ring_size = 32
+        
+        # Pages answering slower than this (seconds) get a loading-state screenshot
+        self.slow_response_threshold = 0.5
+    
+    @staticmethod
+    def _slug(page_url):
+        """Turn a page path into a file name fragment ("/orders/create" -> "orders_create")."""
+        return page_url.replace('/', '_').strip('_') or 'root'
+    
+    def set_viewport(self, device='desktop'):
+        """Set browser viewport size and remember it for the page cache."""
+        super().set_viewport(device)
+        self._current_viewport = device
+    
+    def _visit(self, page_url, selector=None, url=None):
+        """Load a page unless the driver is still showing a recent, untouched load of it.
+        
+        A marker set on the window after loading disappears on any navigation or
+        form submit, so a page that has moved on is always reloaded. Callers that
+        already built the full URL can pass it as url.
+        """
+        url = url or f"{self.base_url}{page_url}"
+        key = (page_url, self._current_viewport)
+        visited_at = self._page_cache.get(key)
+        
+        if (visited_at is not None and time.monotonic() - visited_at < self.page_cache_ttl
+                and self.driver.current_url == url
+                and self.driver.execute_script("return window.__vtVisited === true")):
+            print(f"ℹ️ Reusing loaded page {page_url}")
+            return True
+        
+        self.driver.get(url)
+        loaded = self.wait_for_page_load(selector)
+        if loaded:
+            self.driver.execute_script("window.__vtVisited = true")
+            self._page_cache[key] = time.monotonic()
+        return loaded
+    
+    def _reset_browser_state(self):
+        """Clear cookies and storage so the next test starts clean without a new browser."""
+        if hasattr(self.driver, "execute_cdp_cmd"):
+            self.driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                "origin": self.base_url.rstrip("/"),
+                "storageTypes": "all"
+            })
+        self.driver.delete_all_cookies()
+        self._page_cache.clear()
+    
+    def _poll_ready(self, timeout=5, interval=0.1):
+        """Poll until the current document has finished loading."""
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=interval).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+            return True
+        except TimeoutException:
+            return False
+    
+    def _add_cookies(self, driver, cookies):
+        """Replay session cookies into a driver that is already on the app's domain."""
+        for cookie in cookies:
+            try:
+                driver.add_cookie(cookie)
+            except Exception:
+                # Some drivers reject the expiry/sameSite values they handed out
+                cookie = {k: v for k, v in cookie.items() if k not in ("expiry", "sameSite")}
+                driver.add_cookie(cookie)
+    
+    def ensure_login(self):
+        """Log in once, then restore the cached session cookies on later calls."""
+        if self._auth_cookies:
+            try:
+                self.driver.get(self.base_url)
+                self._add_cookies(self.driver, self._auth_cookies)
+                self.driver.refresh()
+                
+                if "login" not in self.driver.current_url:
+                    return True
+                print("ℹ️ Cached session expired, logging in again")
+            except Exception as e:
+                print(f"⚠️ Could not restore cached session: {e}")
+        
+        if self.login():
+            self._auth_cookies = self.driver.get_cookies()
+            return True
+        
+        self._auth_cookies = None
+        return False
+    
+    def _vt_count(self, key, driver=None):
+        """Count the elements matching a named VT_SELECTORS entry.
+        
+        Runs in the page, so an empty result comes back at once instead of
+        waiting out the driver's implicit wait like find_elements does.
+        """
+        return (driver or self.driver).execute_script(VT_QUERY_SCRIPT, VT_SELECTORS, key, True)
+    
+    def _vt_elements(self, key, driver=None):
+        """Return the elements matching a named VT_SELECTORS entry."""
+        return (driver or self.driver).execute_script(VT_QUERY_SCRIPT, VT_SELECTORS, key, False)
+    
+    def _form_inventory(self):
+        """Count each kind of form control and grab the first of each in one script call.
+        
+        Returns {field_type: {"count": int, "first": WebElement or None}}.
+        """
+        return self.driver.execute_script("""
+            const inventory = {};
+            for (const [key, selector] of Object.entries(arguments[0])) {
+                const nodes = document.querySelectorAll(selector);
+                inventory[key] = {count: nodes.length, first: nodes[0] || null};
+            }
+            return inventory;
+        """, FORM_FIELD_SELECTORS)
+    
+    def take_element_screenshot(self, element, filename, description=""):
+        """Capture just one element's bounding box instead of the whole page."""
+        try:
+            filepath = self.screenshots_dir / filename
+            data = element.screenshot_as_png
+            self._queue_write(filepath, data)
+            print(f"✓ Screenshot queued: {filename} - {description}")
+            return filepath
+        except Exception as e:
+            print(f"✗ Failed to take screenshot {filename}: {e}")
+            return None
+    
+    def take_screenshot_ephemeral(self, filename, description="", element=None, data=None):
+        """Capture an intermediate state into the in-memory ring instead of onto disk.
+        
+        Captures the element's box when one is given, otherwise the viewport; a frame
+        captured earlier can be passed as data instead. The ring keeps the most
+        recent screenshot_ring_size frames.
+        """
+        try:
+            if data is None:
+                data = element.screenshot_as_png if element is not None else self.take_screenshot_bytes()
+            self._screenshot_ring[filename] = data
+            self._screenshot_ring.move_to_end(filename)
+            while len(self._screenshot_ring) > self.screenshot_ring_size:
+                self._screenshot_ring.popitem(last=False)
+            print(f"✓ Screenshot buffered: {filename} - {description}")
+            return True
+        except Exception as e:
+            print(f"✗ Failed to take screenshot {filename}: {e}")
+            return False
+    
+    def flush_screenshot_ring(self):
+        """Write the buffered intermediate screenshots to the screenshots directory."""
+        for filename, data in self._screenshot_ring.items():
+            self._queue_write(self.screenshots_dir / filename, data)
+        if self._screenshot_ring:
+            print(f"📁 Queued {len(self._screenshot_ring)} buffered screenshots for debugging")
+        self._screenshot_ring.clear()
+    
+    def _hover(self, element):
+        """Move the pointer over an element.
+        
+        Synthetic JS mouse events don't apply :hover styles, so on Chromium the
+        pointer is moved with one CDP input event instead of an ActionChains sequence.
+        """
+        if not hasattr(self.driver, "execute_cdp_cmd"):
+            ActionChains(self.driver).move_to_element(element).perform()
+            return
+        
+        x, y = self.driver.execute_script(
+            "arguments[0].scrollIntoView({block: 'center'});"
+            "const r = arguments[0].getBoundingClientRect();"
+            "return [r.left + r.width / 2, r.top + r.height / 2];",
+            element
+        )
+        self.driver.execute_cdp_cmd("Input.dispatchMouseEvent", {"type": "mouseMoved", "x": x, "y": y})
+    
+    def _unhover(self):
+        """Move the pointer off whatever _hover() targeted."""
+        if not hasattr(self.driver, "execute_cdp_cmd"):
+            ActionChains(self.driver).move_by_offset(10, 10).perform()
+            return
+        
+        self.driver.execute_cdp_cmd("Input.dispatchMouseEvent", {"type": "mouseMoved", "x": 0, "y": 0})
+    
+    def _button_fingerprint(self, element):
+        """Summarise the styles a hover effect usually changes, for cheap state comparison."""
+        return self.driver.execute_script(
+            "const s = getComputedStyle(arguments[0]);"
+            "return [s.color, s.backgroundColor, s.borderColor, s.boxShadow, s.transform, s.opacity].join('|');",
+            element
+        )
+    
+    def _page_text_has_error(self, message=None, driver=None):
+        """Check the rendered text for an error without pulling page_source over the wire."""
+        return bool((driver or self.driver).execute_script(
+            "const t = document.body ? document.body.innerText : '';"
+            "return /error/i.test(t) || (!!arguments[0] && t.includes(arguments[0]));",
+            message
+        ))
+    
+    def _wait_for_error_message(self, message=None, timeout=3, interval=0.1):
+        """Wait briefly for an error element or the expected message to appear after a form submit."""
+        # Queried in the page so the driver's implicit wait doesn't stretch the timeout
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=interval).until(
+                lambda d: self._vt_count('error', d) > 0 or self._page_text_has_error(message, d)
+            )
+            return True
+        except TimeoutException:
+            return False
+        
     def test_navigation_styling(self):
         """Test header/navigation styling consistency."""
         print("\n--- Testing Navigation Styling ---")
@@ -34,35 +297,34 @@ class UIComponentsVisualTester(BaseVisualTester):
             ]
             
             # Add authenticated pages after login
-            if self.login():
+            if self.ensure_login():
                 test_pages.extend([
                     ("/", "Home page navigation"),
                     ("/orders", "Orders page navigation"),
                     ("/orders/create", "Create order page navigation"),
                 ])
             
+            test_pages = [(page, desc, f"{self.base_url}{page}") for page, desc in test_pages]
             results = []
             
-            for page_url, description in test_pages:
+            for page_url, description, full_url in test_pages:
                 print(f"Testing {description}...")
+                slug = self._slug(page_url)
                 
                 try:
-                    self.driver.get(f"{self.base_url}{page_url}")
-                    self.wait_for_page_load()
+                    self._visit(page_url, url=full_url)
                     
                     # Take screenshot focusing on navigation
-                    self.take_screenshot(f"navigation_{page_url.replace('/', '_')}.png", description)
+                    self.take_screenshot(f"navigation_{slug}.png", description)
                     
                     # Check for common navigation elements
-                    nav_elements = self.driver.find_elements(By.CSS_SELECTOR, "nav, header, .navbar, .nav")
-                    
-                    if nav_elements:
+                    if self._vt_count('nav'):
                         print(f"✓ Navigation elements found on {description}")
                         results.append((description, True))
                     else:
                         print(f"ℹ️ No explicit navigation elements found on {description}")
                         results.append((description, True))  # Not necessarily a failure
-                        
+                    
                 except Exception as e:
                     print(f"✗ {description} failed: {e}")
                     results.append((description, False))
@@ -85,23 +347,24 @@ class UIComponentsVisualTester(BaseVisualTester):
             ]
             
             # Add authenticated pages after login
-            if self.login():
+            if self.ensure_login():
                 test_pages.extend([
                     ("/orders", "Orders page buttons"),
                     ("/orders/create", "Create order page buttons"),
                 ])
             
+            test_pages = [(page, desc, f"{self.base_url}{page}") for page, desc in test_pages]
             results = []
             
-            for page_url, description in test_pages:
+            for page_url, description, full_url in test_pages:
                 print(f"Testing {description}...")
+                slug = self._slug(page_url)
                 
                 try:
-                    self.driver.get(f"{self.base_url}{page_url}")
-                    self.wait_for_page_load()
+                    self._visit(page_url, url=full_url)
                     
                     # Find all buttons
-                    buttons = self.driver.find_elements(By.CSS_SELECTOR, "button, .btn, input[type='submit']")
+                    buttons = self._vt_elements('buttons')
                     
                     if buttons:
                         print(f"✓ Found {len(buttons)} button(s) on {description}")
@@ -110,19 +373,22 @@ class UIComponentsVisualTester(BaseVisualTester):
                         for i, button in enumerate(buttons[:3]):  # Test first 3 buttons
                             try:
                                 # Normal state
-                                self.take_screenshot(f"button_normal_{page_url.replace('/', '_')}_{i}.png", 
-                                                   f"Button {i} normal state")
+                                self.take_screenshot_ephemeral(f"button_normal_{slug}_{i}.png", 
+                                                               f"Button {i} normal state", button)
+                                normal_fingerprint = self._button_fingerprint(button)
                                 
                                 # Hover state
-                                actions = ActionChains(self.driver)
-                                actions.move_to_element(button).perform()
-                                time.sleep(0.5)
+                                self._hover(button)
                                 
-                                self.take_screenshot(f"button_hover_{page_url.replace('/', '_')}_{i}.png", 
-                                                   f"Button {i} hover state")
+                                # Identical to the normal shot when the button has no hover style
+                                if self._button_fingerprint(button) == normal_fingerprint:
+                                    print(f"ℹ️ Button {i} has no hover style change, skipping hover screenshot")
+                                else:
+                                    self.take_element_screenshot(button, f"button_hover_{slug}_{i}.png", 
+                                                                 f"Button {i} hover state")
                                 
                                 # Move away to reset state
-                                actions.move_by_offset(10, 10).perform()
+                                self._unhover()
                                 
                             except Exception as e:
                                 print(f"⚠️ Could not test button {i}: {e}")
@@ -154,60 +420,52 @@ class UIComponentsVisualTester(BaseVisualTester):
             ]
             
             # Add authenticated pages after login
-            if self.login():
+            if self.ensure_login():
                 form_pages.extend([
                     ("/orders/create", "Create order form fields"),
                 ])
             
+            form_pages = [(page, desc, f"{self.base_url}{page}") for page, desc in form_pages]
             results = []
             
-            for page_url, description in form_pages:
+            for page_url, description, full_url in form_pages:
                 print(f"Testing {description}...")
+                slug = self._slug(page_url)
                 
                 try:
-                    self.driver.get(f"{self.base_url}{page_url}")
-                    self.wait_for_page_load("form")
+                    self._visit(page_url, "form", url=full_url)
                     
                     # Find form elements
-                    form_elements = {
-                        'text_inputs': self.driver.find_elements(By.CSS_SELECTOR, "input[type='text'], input[type='email'], input[type='password']"),
-                        'number_inputs': self.driver.find_elements(By.CSS_SELECTOR, "input[type='number']"),
-                        'select_fields': self.driver.find_elements(By.CSS_SELECTOR, "select"),
-                        'textareas': self.driver.find_elements(By.CSS_SELECTOR, "textarea"),
-                        'labels': self.driver.find_elements(By.CSS_SELECTOR, "label"),
-                        'submit_buttons': self.driver.find_elements(By.CSS_SELECTOR, "button[type='submit'], input[type='submit']"),
-                    }
+                    form_elements = self._form_inventory()
                     
                     # Take screenshot of form
-                    self.take_screenshot(f"form_fields_{page_url.replace('/', '_')}.png", description)
+                    self.take_screenshot(f"form_fields_{slug}.png", description)
                     
                     # Test field states
-                    for field_type, elements in form_elements.items():
-                        if elements:
-                            print(f"✓ Found {len(elements)} {field_type} on {description}")
+                    for field_type, found in form_elements.items():
+                        if found['count']:
+                            print(f"✓ Found {found['count']} {field_type} on {description}")
                             
                             # Test first element of each type
                             if field_type in ['text_inputs', 'number_inputs']:
                                 try:
-                                    first_element = elements[0]
+                                    first_element = found['first']
                                     
                                     # Normal state
-                                    self.take_screenshot(f"field_normal_{field_type}_{page_url.replace('/', '_')}.png", 
-                                                       f"{field_type} normal state")
+                                    self.take_screenshot_ephemeral(f"field_normal_{field_type}_{slug}.png", 
+                                                                   f"{field_type} normal state", first_element)
                                     
                                     # Focus state
                                     first_element.click()
-                                    time.sleep(0.5)
                                     
-                                    self.take_screenshot(f"field_focus_{field_type}_{page_url.replace('/', '_')}.png", 
-                                                       f"{field_type} focus state")
+                                    self.take_screenshot_ephemeral(f"field_focus_{field_type}_{slug}.png", 
+                                                                   f"{field_type} focus state", first_element)
                                     
                                     # Filled state
                                     first_element.send_keys("test")
-                                    time.sleep(0.5)
                                     
-                                    self.take_screenshot(f"field_filled_{field_type}_{page_url.replace('/', '_')}.png", 
-                                                       f"{field_type} filled state")
+                                    self.take_element_screenshot(first_element, f"field_filled_{field_type}_{slug}.png", 
+                                                                 f"{field_type} filled state")
                                     
                                     # Clear field
                                     first_element.clear()
@@ -297,9 +555,7 @@ class UIComponentsVisualTester(BaseVisualTester):
             # Try to capture loading state
             try:
                 # Look for loading indicators
-                loading_elements = self.driver.find_elements(By.CSS_SELECTOR, ".loading, .spinner, [class*='load']")
-                
-                if loading_elements:
+                if self._vt_count('loading'):
                     self.take_screenshot("login_loading_state.png", "Login loading state")
                     print("✓ Login loading state captured")
                     return True
@@ -319,7 +575,7 @@ class UIComponentsVisualTester(BaseVisualTester):
         """Test form submission loading states."""
         try:
             # Test with order creation form if authenticated
-            if self.login():
+            if self.ensure_login():
                 self.driver.get(f"{self.base_url}/orders/create")
                 self.wait_for_page_load("form")
                 
@@ -348,9 +604,7 @@ class UIComponentsVisualTester(BaseVisualTester):
                 
                 # Try to capture loading state
                 try:
-                    loading_elements = self.driver.find_elements(By.CSS_SELECTOR, ".loading, .spinner, [class*='load']")
-                    
-                    if loading_elements:
+                    if self._vt_count('loading'):
                         self.take_screenshot("form_submission_loading.png", "Form submission loading state")
                         print("✓ Form submission loading state captured")
                         return True
@@ -368,25 +622,79 @@ class UIComponentsVisualTester(BaseVisualTester):
             print(f"✗ Form submission loading test failed: {e}")
             return False
     
+    @staticmethod
+    def _parse_response_time(value):
+        """Parse an X-Response-Time header ("12.3ms", "0.5s" or bare milliseconds) into seconds."""
+        value = value.strip().lower()
+        if value.endswith("ms"):
+            return float(value[:-2]) / 1000
+        if value.endswith("s"):
+            return float(value[:-1])
+        return float(value) / 1000
+    
+    async def _time_response(self, full_url):
+        """Return the server's response time for a URL in seconds.
+        
+        Uses the app's X-Response-Time header when it sends one, otherwise the
+        measured time to first byte.
+        """
+        cookies = {c["name"]: c["value"] for c in self._auth_cookies or []}
+        async with httpx.AsyncClient(cookies=cookies, timeout=self.default_timeout) as client:
+            started = time.perf_counter()
+            async with client.stream("GET", full_url) as response:
+                ttfb = time.perf_counter() - started
+                header = response.headers.get("X-Response-Time")
+        return self._parse_response_time(header) if header else ttfb
+    
+    async def _probe(self, full_url):
+        """Start navigating to a URL, capture a frame mid-load and time the server's response.
+        
+        The navigation is started from page script, which returns at once, so the
+        frame is taken while the new page is still loading; driver.get would block
+        until it had finished. Returns (response time in seconds or None, frame bytes).
+        """
+        timing = asyncio.create_task(self._time_response(full_url))
+        await asyncio.to_thread(
+            self.driver.execute_script,
+            "window.__vtNavPending = true; window.location.assign(arguments[0]);", full_url
+        )
+        frame = await asyncio.to_thread(self.take_screenshot_bytes)
+        
+        try:
+            return await timing, frame
+        except httpx.HTTPError as e:
+            print(f"⚠️ Response time probe failed for {full_url}: {e}")
+            return None, frame
+    
     def test_page_navigation_loading(self):
         """Test page navigation loading states."""
         try:
             # Test navigation between pages
-            pages = ["/login", "/register"]
+            pages = [(page, f"{self.base_url}{page}") for page in ["/login", "/register"]]
             
-            for page in pages:
+            for page, full_url in pages:
+                slug = self._slug(page)
+                
                 try:
-                    self.driver.get(f"{self.base_url}{page}")
+                    response_time, loading_frame = asyncio.run(self._probe(full_url))
                     
-                    # Take screenshot of page loading
-                    self.take_screenshot(f"page_loading_{page.replace('/', '_')}.png", 
-                                       f"Page loading for {page}")
+                    # A fast page has no loading state worth keeping
+                    if response_time is None or response_time > self.slow_response_threshold:
+                        self.take_screenshot_ephemeral(f"page_loading_{slug}.png", 
+                                                       f"Page loading for {page}", data=loading_frame)
+                    else:
+                        print(f"ℹ️ {page} responded in {response_time * 1000:.0f} ms, skipping loading screenshot")
+                    
+                    # The marker set before navigating is gone once the new document has replaced the old one
+                    WebDriverWait(self.driver, self.default_timeout).until(
+                        lambda d: d.execute_script("return !window.__vtNavPending && document.readyState === 'complete'")
+                    )
                     
                     # Wait for page to fully load
                     self.wait_for_page_load()
                     
                     # Take screenshot of loaded page
-                    self.take_screenshot(f"page_loaded_{page.replace('/', '_')}.png", 
+                    self.take_screenshot(f"page_loaded_{slug}.png", 
                                        f"Page loaded for {page}")
                     
                 except Exception as e:
@@ -398,6 +706,74 @@ class UIComponentsVisualTester(BaseVisualTester):
             print(f"✗ Page navigation loading test failed: {e}")
             return False
     
+    def setup_driver_for_worker(self):
+        """Create a WebDriver session owned by a single responsive test worker.
+        
+        Uses the Selenium Grid hub from VISUAL_TEST_GRID_URL when set,
+        otherwise a local Chrome instance.
+        """
+        grid_url = os.environ.get("VISUAL_TEST_GRID_URL")
+        if grid_url:
+            driver = webdriver.Remote(command_executor=grid_url, options=self.chrome_options)
+        else:
+            driver = webdriver.Chrome(options=self.chrome_options)
+        driver.implicitly_wait(self.default_timeout)
+        return driver
+    
+    def _run_job(self, driver, page_url, device):
+        """Screenshot the UI components of one page at one viewport."""
+        print(f"Testing {page_url} components on {device}...")
+        
+        driver.get(f"{self.base_url}{page_url}")
+        self.wait_for_page_load(driver=driver)
+        
+        # Take screenshot
+        self.take_screenshot(f"components_{self._slug(page_url)}_{device}.png", 
+                           f"Components on {page_url} for {device}", driver=driver)
+        
+        # Check for responsive elements
+        responsive_count = self._vt_count('responsive', driver)
+        
+        if responsive_count:
+            print(f"✓ Found {responsive_count} responsive elements")
+        
+        return True
+    
+    def _responsive_worker(self, jobs, cookies):
+        """Drain (device, pages) jobs from the queue on a dedicated driver.
+        
+        The window is resized once per device and every page is captured at
+        that size, so each worker pays for one relayout per viewport.
+        """
+        results = []
+        driver = self.setup_driver_for_worker()
+        
+        try:
+            # Carry the main session's login over to this browser
+            if cookies:
+                driver.get(self.base_url)
+                self._add_cookies(driver, cookies)
+            
+            while True:
+                try:
+                    device, pages = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                
+                width, height = self.viewports[device]
+                driver.set_window_size(width, height)
+                
+                for page_url in pages:
+                    try:
+                        results.append((f"{page_url}_{device}", self._run_job(driver, page_url, device)))
+                    except Exception as e:
+                        print(f"✗ {page_url} on {device} failed: {e}")
+                        results.append((f"{page_url}_{device}", False))
+        finally:
+            driver.quit()
+        
+        return results
+    
     def test_responsive_ui_components(self):
         """Test UI components responsiveness."""
         print("\n--- Testing Responsive UI Components ---")
@@ -406,36 +782,34 @@ class UIComponentsVisualTester(BaseVisualTester):
             # Test key pages across different viewports
             test_pages = ["/login", "/register"]
             
-            if self.login():
+            cookies = None
+            if self.ensure_login():
                 test_pages.extend(["/orders", "/orders/create"])
+                cookies = self._auth_cookies
+            
+            # One job per viewport, covering every page at that size
+            jobs = queue.Queue()
+            for device in self.viewports.keys():
+                jobs.put((device, test_pages))
             
             results = []
             
-            for page_url in test_pages:
-                for device in self.viewports.keys():
-                    print(f"Testing {page_url} components on {device}...")
-                    
+            # Each worker owns one browser, so screenshots run concurrently
+            with ThreadPoolExecutor(max_workers=len(self.viewports)) as executor:
+                futures = [executor.submit(self._responsive_worker, jobs, cookies)
+                           for _ in range(len(self.viewports))]
+                for future in futures:
                     try:
-                        self.set_viewport(device)
-                        self.driver.get(f"{self.base_url}{page_url}")
-                        self.wait_for_page_load()
-                        
-                        # Take screenshot
-                        self.take_screenshot(f"components_{page_url.replace('/', '_')}_{device}.png", 
-                                           f"Components on {page_url} for {device}")
-                        
-                        # Check for responsive elements
-                        responsive_elements = self.driver.find_elements(By.CSS_SELECTOR, 
-                                                                       "[class*='responsive'], [class*='mobile'], [class*='tablet'], [class*='desktop']")
-                        
-                        if responsive_elements:
-                            print(f"✓ Found {len(responsive_elements)} responsive elements")
-                        
-                        results.append((f"{page_url}_{device}", True))
-                        
+                        results.extend(future.result())
                     except Exception as e:
-                        print(f"✗ {page_url} on {device} failed: {e}")
-                        results.append((f"{page_url}_{device}", False))
+                        print(f"✗ Responsive worker failed: {e}")
+            
+            # Jobs left behind by workers that could not start count as failures
+            while not jobs.empty():
+                device, pages = jobs.get_nowait()
+                for page_url in pages:
+                    print(f"✗ {page_url} on {device} was not run")
+                    results.append((f"{page_url}_{device}", False))
             
             return all(success for _, success in results)
             
@@ -466,9 +840,10 @@ class UIComponentsVisualTester(BaseVisualTester):
             
             for scenario in error_scenarios:
                 print(f"Testing {scenario['description']}...")
+                full_url = f"{self.base_url}{scenario['page']}"
                 
                 try:
-                    self.driver.get(f"{self.base_url}{scenario['page']}")
+                    self.driver.get(full_url)
                     self.wait_for_page_load("form")
                     
                     # Trigger error
@@ -476,7 +851,7 @@ class UIComponentsVisualTester(BaseVisualTester):
                     
                     if error_triggered:
                         # Take screenshot of error state
-                        self.take_screenshot(f"error_state_{scenario['page'].replace('/', '_')}.png", 
+                        self.take_screenshot(f"error_state_{self._slug(scenario['page'])}.png", 
                                            scenario['description'])
                         
                         results.append((scenario['description'], True))
@@ -505,14 +880,8 @@ class UIComponentsVisualTester(BaseVisualTester):
             password_field.send_keys("invalid_password")
             password_field.submit()
             
-            time.sleep(2)  # Wait for error to appear
-            
-            # Check if error message appears
-            page_source = self.driver.page_source
-            if "IDまたはパスワードが違います" in page_source or "error" in page_source.lower():
-                return True
-            
-            return False
+            self._poll_ready()
+            return self._wait_for_error_message("IDまたはパスワードが違います")
             
         except Exception as e:
             print(f"⚠️ Could not trigger login error: {e}")
@@ -529,21 +898,38 @@ class UIComponentsVisualTester(BaseVisualTester):
             password_field.send_keys("asdf")
             password_field.submit()
             
-            time.sleep(2)  # Wait for error to appear
-            
-            # Check if error message appears
-            page_source = self.driver.page_source
-            if "既に存在します" in page_source or "error" in page_source.lower():
-                return True
-            
-            return False
+            self._poll_ready()
+            return self._wait_for_error_message("既に存在します")
             
         except Exception as e:
             print(f"⚠️ Could not trigger register error: {e}")
             return False
     
-    def run_page_specific_tests(self):
-        """Run all UI components specific tests."""
+    def run_page_specific_tests(self, fail_fast=None):
+        """Run all UI components specific tests.
+        
+        With fail_fast (default: VISUAL_TEST_FAIL_FAST=1) the remaining tests are
+        skipped after the first failure.
+        """
+        if fail_fast is None:
+            fail_fast = os.getenv("VISUAL_TEST_FAIL_FAST", "0") == "1"
+        
+        # One browser serves every test; only its state is reset in between
+        if self.driver is None:
+            if not self.setup_driver():
+                return False
+            self._owned_driver = True
+        
+        try:
+            return self._run_tests_on_shared_driver(fail_fast)
+        finally:
+            if self._owned_driver:
+                self.teardown_driver()
+                self.driver = None
+                self._owned_driver = False
+    
+    def _run_tests_on_shared_driver(self, fail_fast):
+        """Run the UI component tests in order on the current driver."""
         tests = [
             ("Navigation Styling", self.test_navigation_styling),
             ("Button States and Interactions", self.test_button_states_and_interactions),
@@ -554,14 +940,28 @@ class UIComponentsVisualTester(BaseVisualTester):
         ]
         
         results = []
-        for test_name, test_func in tests:
+        for index, (test_name, test_func) in enumerate(tests):
             print(f"\n{'='*20} {test_name} {'='*20}")
             try:
+                if index:
+                    self._reset_browser_state()
                 result = test_func()
                 results.append((test_name, result))
             except Exception as e:
                 print(f"✗ {test_name} failed: {e}")
+                result = False
                 results.append((test_name, False))
+            
+            # Intermediate frames are only worth keeping when the test failed
+            if result:
+                self._screenshot_ring.clear()
+            else:
+                self.flush_screenshot_ring()
+            
+            if not result and fail_fast:
+                print("⏭️ Fail-fast enabled, skipping remaining tests")
+                results.extend((name, None) for name, _ in tests[index + 1:])
+                break
         
         # Print summary
         print(f"\n{'='*50}")
@@ -570,7 +970,10 @@ class UIComponentsVisualTester(BaseVisualTester):
         
         passed = 0
         for test_name, result in results:
-            status = "✓ PASS" if result else "✗ FAIL"
+            if result is None:
+                status = "⏭️ SKIP"
+            else:
+                status = "✓ PASS" if result else "✗ FAIL"
             print(f"{status}: {test_name}")
             if result:
                 passed += 1
@@ -596,18 +999,26 @@ class UIComponentsVisualTester(BaseVisualTester):
                 ('error_state_login', '/login'),
             ]
             
+            # Several states share a page, so load each page once and save every state from it
+            by_url = {}
             for state_name, page_url in ui_states:
-                print(f"Creating baseline for {state_name}...")
+                by_url.setdefault(page_url, []).append(state_name)
+            
+            for page_url, state_names in by_url.items():
+                print(f"Creating baselines for {', '.join(state_names)}...")
                 
                 try:
-                    self.driver.get(f"{self.base_url}{page_url}")
-                    self.wait_for_page_load()
+                    self._visit(page_url)
+                    self.driver.execute_script("window.scrollTo(0, 0);")
+                    data = self.take_screenshot_bytes()
                     
-                    baseline_filename = f"expected_{state_name}.png"
-                    self.take_screenshot(baseline_filename, f"Baseline for {state_name}", self.baseline_dir)
+                    for state_name in state_names:
+                        baseline_path = self.baseline_dir / f"expected_{state_name}.png"
+                        self._queue_write(baseline_path, data)
+                        print(f"✓ Screenshot queued: {baseline_path.name} - Baseline for {state_name}")
                     
                 except Exception as e:
-                    print(f"⚠️ Could not create baseline for {state_name}: {e}")
+                    print(f"⚠️ Could not create baselines for {page_url}: {e}")
             
             return True
             
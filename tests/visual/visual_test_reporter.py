@@ -7,15 +7,154 @@ Generates comprehensive HTML reports for visual regression tests with performanc
 import os
 import sys
 import json
+import logging
 import time
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 import base64
-from jinja2 import Template
+import gzip
+import io
+import html
+from jinja2 import DictLoader, Environment, Template, select_autoescape
 import sqlite3
-from dataclasses import dataclass
-import hashlib
+from dataclasses import dataclass, asdict
+from collections import defaultdict
+from contextlib import contextmanager
+import secrets
+import operator
+import threading
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+
+def _json_default(obj):
+    """Stdlib json fallback for the types orjson serializes natively."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return asdict(obj)
+
+
+# Buffered test results are written in one transaction once this many are pending
+RESULT_BATCH_SIZE = 500
+
+INSERT_RESULT_SQL = '''
+    INSERT INTO test_results (
+        test_session_id, test_name, page_name, device, status,
+        similarity, threshold, duration, screenshot_path, baseline_path,
+        diff_path, error_message, timestamp
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_SESSION_SQL = '''
+    INSERT INTO test_sessions (id, test_env, started_at)
+    VALUES (?, ?, ?)
+'''
+
+UPDATE_SESSION_SQL = '''
+    UPDATE test_sessions 
+    SET ended_at = ?, total_tests = ?, passed_tests = ?, 
+        failed_tests = ?, error_tests = ?, total_duration = ?, 
+        avg_similarity = ?, status = 'completed'
+    WHERE id = ?
+'''
+
+# Columns follow TestResult's field order, with NULLs mapped to the dataclass defaults
+SELECT_RESULTS_SQL = '''
+    SELECT test_name, page_name, device, status,
+           COALESCE(similarity, 0.0), COALESCE(threshold, 95.0),
+           COALESCE(duration, 0.0), COALESCE(screenshot_path, ''),
+           COALESCE(baseline_path, ''), COALESCE(diff_path, ''),
+           COALESCE(error_message, ''), COALESCE(timestamp, '')
+    FROM test_results 
+    WHERE test_session_id = ?
+    ORDER BY timestamp ASC
+'''
+
+# Only the columns the CI failure list needs, for failed results only
+SELECT_FAILURES_SQL = '''
+    SELECT test_name, page_name, device,
+           COALESCE(similarity, 0.0) AS similarity,
+           COALESCE(error_message, '') AS error_message
+    FROM test_results 
+    WHERE test_session_id = ? AND status = 'failed'
+    ORDER BY timestamp ASC
+'''
+
+# Includes the CI pass rate and pass/fail verdict, computed by SQLite
+SELECT_SESSION_SQL = '''
+    SELECT test_env, started_at, ended_at, total_tests, passed_tests,
+           failed_tests, error_tests, total_duration, avg_similarity, status,
+           COALESCE(CAST(passed_tests AS REAL) / NULLIF(total_tests, 0) * 100, 0) AS pass_rate,
+           CASE WHEN COALESCE(failed_tests, 0) = 0 THEN 'passed' ELSE 'failed' END AS ci_status
+    FROM test_sessions 
+    WHERE id = ?
+'''
+
+DAILY_PASS_RATES_SQL = '''
+    SELECT date(started_at) AS day, COUNT(*) AS sessions,
+           SUM(total_tests) AS total_tests, SUM(passed_tests) AS passed_tests,
+           100.0 * SUM(passed_tests) / NULLIF(SUM(total_tests), 0) AS pass_rate
+    FROM test_sessions 
+    WHERE started_at > ? AND status = 'completed'
+    GROUP BY day
+    ORDER BY day DESC
+'''
+
+# Summary aggregates computed by SQLite; zero similarities/durations are treated as missing
+SUMMARY_STATS_SQL = '''
+    SELECT COUNT(*),
+           SUM(status = 'passed'), SUM(status = 'failed'), SUM(status = 'error'),
+           AVG(CASE WHEN similarity > 0 THEN similarity END),
+           AVG(CASE WHEN duration > 0 THEN duration END),
+           SUM(CASE WHEN duration > 0 THEN duration END)
+    FROM test_results
+    WHERE test_session_id = ?
+'''
+
+# Per-device / per-page aggregates; statuses other than passed/failed count as errors
+_GROUP_STATS_SQL = '''
+    SELECT {column}, COUNT(*),
+           SUM(status = 'passed'), SUM(status = 'failed'),
+           AVG(CASE WHEN similarity > 0 THEN similarity END),
+           AVG(CASE WHEN duration > 0 THEN duration END)
+    FROM test_results
+    WHERE test_session_id = ?
+    GROUP BY {column}
+'''
+DEVICE_STATS_SQL = _GROUP_STATS_SQL.format(column='device')
+PAGE_STATS_SQL = _GROUP_STATS_SQL.format(column='page_name')
+
+SELECT_HISTORY_SQL = '''
+    SELECT id, test_env, started_at, ended_at, total_tests, 
+           passed_tests, failed_tests, error_tests, 
+           total_duration, avg_similarity, status
+    FROM test_sessions 
+    WHERE started_at > ? AND status = 'completed'
+    ORDER BY started_at DESC
+'''
+
+# Pulls the TestResult fields in INSERT_RESULT_SQL column order (after the session id)
+_ROW_GETTER = operator.attrgetter(
+    'test_name', 'page_name', 'device', 'status', 'similarity', 'threshold', 'duration',
+    'screenshot_path', 'baseline_path', 'diff_path', 'error_message', 'timestamp'
+)
+
+# Fields read per row by _render_result_rows, fetched in a single C-level call
+_RENDER_GETTER = operator.attrgetter(
+    'test_name', 'page_name', 'device', 'status', 'similarity', 'duration',
+    'timestamp', 'error_message', 'diff_path'
+)
 
 
 @dataclass
@@ -33,59 +172,88 @@ class TestResult:
     diff_path: str = ""
     error_message: str = ""
     timestamp: str = ""
-    
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "test_name": self.test_name,
-            "page_name": self.page_name,
-            "device": self.device,
-            "status": self.status,
-            "similarity": self.similarity,
-            "threshold": self.threshold,
-            "duration": self.duration,
-            "screenshot_path": self.screenshot_path,
-            "baseline_path": self.baseline_path,
-            "diff_path": self.diff_path,
-            "error_message": self.error_message,
-            "timestamp": self.timestamp
-        }
 
 
 class VisualTestReporter:
     """Generates comprehensive visual test reports with performance metrics."""
     
-    def __init__(self, test_env: str = "visual_test"):
+    def __init__(self, test_env: str = "visual_test", fast_mode: bool = False, reports_dir: Path = None):
         self.test_env = test_env
+        self._log = logging.getLogger(__name__)
+        self.fast_mode = fast_mode
         self.test_dir = Path(__file__).parent
-        self.reports_dir = self.test_dir / "reports"
-        self.reports_dir.mkdir(exist_ok=True)
+        self.reports_dir = Path(reports_dir) if reports_dir else self.test_dir / "reports"
+        self.reports_dir.mkdir(parents=True, exist_ok=True)
         
         # Database for storing test results
         self.db_path = self.reports_dir / "test_results.db"
         self.init_database()
         
+        # Long-lived connection in autocommit mode; result rows are batched into explicit transactions.
+        # It may be shared across worker threads, so every use goes through self._lock.
+        # A larger statement cache keeps every module-level SQL constant prepared.
+        self._conn = sqlite3.connect(str(self.db_path), isolation_level=None, check_same_thread=False,
+                                     cached_statements=256)
+        self._apply_pragmas(self._conn)
+        self._lock = threading.Lock()
+        self._pending = []
+        
+        # Separate read-only connection for report queries, opened on first use.
+        # Reentrant so a report can hold one read transaction across several queries.
+        self._ro = None
+        self._ro_lock = threading.RLock()
+        
+        # Performance tracking; plain counters on the hot path, see performance_metrics
+        self._total = 0
+        self._passed = 0
+        self._failed = 0
+        self._error = 0
+        self._duration = 0.0
+        self._sim_sum = 0.0  # zero similarities are not counted
+        self._sim_count = 0
+        self._screenshots = 0
+        self._baselines = 0
+        self._started_at = ""
+        self._ended_at = ""
+        
         # Report templates
         self.html_template = self.get_html_template()
-        self.json_template = self.get_json_template()
-        
-        # Performance tracking
-        self.performance_metrics = {
-            "total_tests": 0,
-            "passed_tests": 0,
-            "failed_tests": 0,
-            "error_tests": 0,
-            "total_duration": 0.0,
-            "avg_similarity": 0.0,
-            "screenshots_generated": 0,
-            "baselines_compared": 0,
-            "started_at": "",
-            "ended_at": ""
+    
+    @property
+    def performance_metrics(self) -> Dict[str, Any]:
+        """Performance metrics for the current session, built from the running counters."""
+        return {
+            "total_tests": self._total,
+            "passed_tests": self._passed,
+            "failed_tests": self._failed,
+            "error_tests": self._error,
+            "total_duration": self._duration,
+            "avg_similarity": self._sim_sum / self._sim_count if self._sim_count else 0.0,
+            "screenshots_generated": self._screenshots,
+            "baselines_compared": self._baselines,
+            "started_at": self._started_at,
+            "ended_at": self._ended_at
         }
     
+    def _apply_pragmas(self, conn: sqlite3.Connection):
+        """Tune a connection for write-heavy report sessions.
+        
+        WAL with synchronous=NORMAL avoids an fsync per commit; fast_mode turns
+        syncing off entirely, for CI runs where a crash only loses the report.
+        """
+        conn.executescript(f'''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous={"OFF" if self.fast_mode else "NORMAL"};
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-20000;
+            PRAGMA mmap_size=268435456;
+        ''')
+    
     def init_database(self):
         """Initialize SQLite database for test results."""
         try:
             conn = sqlite3.connect(str(self.db_path))
+            self._apply_pragmas(conn)
             cursor = conn.cursor()
             
             # Create test results table
@@ -140,265 +308,342 @@ class VisualTestReporter:
                 )
             ''')
             
+            # Indexes for per-session lookups (already ordered by timestamp) and history queries
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_session_ts ON test_results(test_session_id, timestamp)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_started ON test_sessions(started_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_session_status ON test_results(test_session_id, status)')
+            
             conn.commit()
             conn.close()
             
-            print("✓ Test results database initialized")
+            self._log.info("Test results database initialized")
             
         except Exception as e:
-            print(f"✗ Failed to initialize database: {e}")
+            self._log.error("Failed to initialize database: %s", e)
     
     def start_test_session(self) -> str:
         """Start a new test session."""
-        session_id = f"session_{int(time.time())}_{hashlib.md5(str(datetime.now()).encode()).hexdigest()[:8]}"
+        session_id = f"session_{int(time.time())}_{secrets.token_hex(4)}"
         
-        self.performance_metrics["started_at"] = datetime.now().isoformat()
+        self._started_at = datetime.now().isoformat()
         
         try:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
+            with self._lock:
+                self._conn.execute(INSERT_SESSION_SQL, (session_id, self.test_env, self._started_at))
             
-            cursor.execute('''
-                INSERT INTO test_sessions (id, test_env, started_at)
-                VALUES (?, ?, ?)
-            ''', (session_id, self.test_env, self.performance_metrics["started_at"]))
-            
-            conn.commit()
-            conn.close()
-            
-            print(f"✓ Test session started: {session_id}")
+            self._log.info("Test session started: %s", session_id)
             
         except Exception as e:
-            print(f"⚠️ Failed to record test session: {e}")
+            self._log.warning("Failed to record test session: %s", e)
         
         return session_id
     
     def end_test_session(self, session_id: str):
         """End a test session and update metrics."""
-        self.performance_metrics["ended_at"] = datetime.now().isoformat()
+        self._ended_at = datetime.now().isoformat()
+        metrics = self.performance_metrics
         
-        # Calculate average similarity
-        if self.performance_metrics["total_tests"] > 0:
-            self.performance_metrics["avg_similarity"] = (
-                self.performance_metrics["avg_similarity"] / self.performance_metrics["total_tests"]
-            )
+        self.flush_results()
         
         try:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
+            with self._lock:
+                self._conn.execute(UPDATE_SESSION_SQL, (
+                    metrics["ended_at"],
+                    metrics["total_tests"],
+                    metrics["passed_tests"],
+                    metrics["failed_tests"],
+                    metrics["error_tests"],
+                    metrics["total_duration"],
+                    metrics["avg_similarity"],
+                    session_id
+                ))
+                
+                # Gather planner statistics once the database holds its first results
+                has_stats = self._conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+                ).fetchone()
+                if not has_stats:
+                    self._conn.execute("ANALYZE")
             
-            cursor.execute('''
-                UPDATE test_sessions 
-                SET ended_at = ?, total_tests = ?, passed_tests = ?, 
-                    failed_tests = ?, error_tests = ?, total_duration = ?, 
-                    avg_similarity = ?, status = 'completed'
-                WHERE id = ?
-            ''', (
-                self.performance_metrics["ended_at"],
-                self.performance_metrics["total_tests"],
-                self.performance_metrics["passed_tests"],
-                self.performance_metrics["failed_tests"],
-                self.performance_metrics["error_tests"],
-                self.performance_metrics["total_duration"],
-                self.performance_metrics["avg_similarity"],
-                session_id
-            ))
+            self._log.info("Test session ended: %s", session_id)
             
-            conn.commit()
-            conn.close()
+        except Exception as e:
+            self._log.warning("Failed to update test session: %s", e)
+    
+    def flush_results(self):
+        """Write buffered test results to the database in a single transaction."""
+        with self._lock:
+            if not self._pending:
+                return
             
-            print(f"✓ Test session ended: {session_id}")
+            # Swap the buffer so rows recorded by other threads during the write are kept
+            pending, self._pending = self._pending, []
             
-        except Exception as e:
-            print(f"⚠️ Failed to update test session: {e}")
+            # Results recorded without a timestamp carry their record time as epoch seconds
+            fromtimestamp = datetime.fromtimestamp
+            pending = [row if isinstance(row[-1], str) else (*row[:-1], fromtimestamp(row[-1]).isoformat())
+                       for row in pending]
+            
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(INSERT_RESULT_SQL, pending)
+                self._conn.execute("COMMIT")
+                
+            except Exception as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                self._log.warning("Failed to record %s test results: %s", len(pending), e)
     
-    def record_test_result(self, session_id: str, test_result: TestResult):
-        """Record a test result in the database."""
-        # Update performance metrics
-        self.performance_metrics["total_tests"] += 1
-        
-        if test_result.status == "passed":
-            self.performance_metrics["passed_tests"] += 1
-        elif test_result.status == "failed":
-            self.performance_metrics["failed_tests"] += 1
-        else:
-            self.performance_metrics["error_tests"] += 1
+    def _ro_conn(self) -> sqlite3.Connection:
+        """Return the shared read-only connection used by report queries.
         
-        self.performance_metrics["total_duration"] += test_result.duration
-        self.performance_metrics["avg_similarity"] += test_result.similarity
-        
-        if test_result.screenshot_path:
-            self.performance_metrics["screenshots_generated"] += 1
-        
-        if test_result.baseline_path:
-            self.performance_metrics["baselines_compared"] += 1
+        Reads go through a large page cache and mmap; the database is already in WAL
+        mode (set by the writer), so they do not block on pending result batches.
+        """
+        if self._ro is None:
+            self._ro = sqlite3.connect(f"{self.db_path.as_uri()}?mode=ro", uri=True,
+                                       check_same_thread=False, cached_statements=256)
+            self._ro.executescript('''
+                PRAGMA mmap_size=268435456;
+                PRAGMA cache_size=-65536;
+                PRAGMA temp_store=MEMORY;
+            ''')
+        return self._ro
+    
+    @contextmanager
+    def _read_snapshot(self):
+        """Run several report queries inside a single read transaction.
         
-        # Store in database
+        The report sees one consistent snapshot and pays transaction setup once. Report
+        generation never writes, so there is no insert path to batch here.
+        """
+        self.flush_results()
+        with self._ro_lock:
+            conn = self._ro_conn()
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.execute("COMMIT")
+    
+    def close(self):
+        """Flush any buffered results and close the database connections."""
+        if self._conn is None:
+            return
+        self.flush_results()
+        with self._ro_lock:
+            if self._ro is not None:
+                self._ro.close()
+                self._ro = None
+        with self._lock:
+            self._conn.close()
+            self._conn = None
+    
+    def __del__(self):
         try:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
+            self.close()
+        except Exception:
+            pass
+    
+    def record_test_result(self, session_id: str, test_result: TestResult):
+        """Record a test result; rows are buffered and written in batches."""
+        row = (session_id, *_ROW_GETTER(test_result))
+        if not row[-1]:
+            # Stamp the record time cheaply; flush_results() turns it into ISO text
+            row = (*row[:-1], time.time())
+        status = test_result.status
+        
+        # Counters and buffer change together under the lock flush_results() swaps the buffer with
+        with self._lock:
+            self._total += 1
             
-            cursor.execute('''
-                INSERT INTO test_results (
-                    test_session_id, test_name, page_name, device, status,
-                    similarity, threshold, duration, screenshot_path, baseline_path,
-                    diff_path, error_message, timestamp
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                session_id,
-                test_result.test_name,
-                test_result.page_name,
-                test_result.device,
-                test_result.status,
-                test_result.similarity,
-                test_result.threshold,
-                test_result.duration,
-                test_result.screenshot_path,
-                test_result.baseline_path,
-                test_result.diff_path,
-                test_result.error_message,
-                test_result.timestamp
-            ))
+            if status == "passed":
+                self._passed += 1
+            elif status == "failed":
+                self._failed += 1
+            else:
+                self._error += 1
             
-            conn.commit()
-            conn.close()
+            self._duration += test_result.duration
+            if test_result.similarity > 0:
+                self._sim_sum += test_result.similarity
+                self._sim_count += 1
             
-        except Exception as e:
-            print(f"⚠️ Failed to record test result: {e}")
+            if test_result.screenshot_path:
+                self._screenshots += 1
+            
+            if test_result.baseline_path:
+                self._baselines += 1
+            
+            # Queue for the database
+            self._pending.append(row)
+            batch_full = len(self._pending) >= RESULT_BATCH_SIZE
+        
+        if batch_full:
+            self.flush_results()
     
-    def generate_html_report(self, session_id: str, output_path: Path = None) -> Path:
+    def load_context(self, session_id: str) -> Dict[str, Any]:
+        """Load everything a report needs for a session, from one consistent snapshot.
+        
+        The result can be passed as ``context`` to several report generators so the
+        database is only read once.
+        """
+        with self._read_snapshot():
+            test_results = self.get_session_results(session_id)
+            context = {
+                "test_results": test_results,
+                "session_data": self.get_session_data(session_id),
+                "summary_stats": self._summary_stats_sql(session_id),
+                "device_stats": self._device_stats_sql(session_id),
+                "page_stats": self._page_stats_sql(session_id)
+            }
+        context["failure_analysis"] = self.analyze_failures(test_results)
+        return context
+    
+    def _open_report(self, output_path: Path, compress: bool):
+        """Open a report file for binary writing, gzip-compressed if requested.
+        
+        Returns the (possibly ``.gz``-suffixed) path and the open file object.
+        """
+        if not compress:
+            return output_path, open(output_path, 'wb', buffering=1 << 20)
+        
+        output_path = Path(output_path)
+        if output_path.suffix != '.gz':
+            output_path = output_path.with_name(output_path.name + '.gz')
+        # Reports are written once and read rarely, so favour speed over ratio
+        return output_path, gzip.open(output_path, 'wb', compresslevel=1)
+    
+    def generate_html_report(self, session_id: str, output_path: Path = None, compress: bool = False,
+                             now: datetime = None, context: Dict[str, Any] = None) -> Path:
         """Generate comprehensive HTML report."""
+        now = now or datetime.now()
         if not output_path:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = now.strftime("%Y%m%d_%H%M%S")
             output_path = self.reports_dir / f"visual_test_report_{timestamp}.html"
         
-        # Get test results from database
-        test_results = self.get_session_results(session_id)
-        session_data = self.get_session_data(session_id)
+        context = context or self.load_context(session_id)
+        test_results = context["test_results"]
         
         # Prepare template data
         template_data = {
             "session_id": session_id,
-            "session_data": session_data,
+            "session_data": context["session_data"],
             "test_results": test_results,
+            "rows_html": self._render_result_rows(test_results),
             "performance_metrics": self.performance_metrics,
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": now.isoformat(),
             "report_title": f"Visual Test Report - {session_id}",
-            "summary_stats": self.calculate_summary_stats(test_results),
-            "device_stats": self.calculate_device_stats(test_results),
-            "page_stats": self.calculate_page_stats(test_results),
-            "failure_analysis": self.analyze_failures(test_results)
+            "summary_stats": context["summary_stats"],
+            "device_stats": context["device_stats"],
+            "page_stats": context["page_stats"],
+            "failure_analysis": context["failure_analysis"]
         }
         
         # Render HTML template
         try:
-            template = Template(self.html_template)
-            html_content = template.render(**template_data)
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            # Stream rendered chunks straight to disk instead of building the whole page in memory
+            output_path, f = self._open_report(output_path, compress)
+            stream = self.html_template.stream(**template_data)
+            # Batch template chunks so per-write overhead doesn't dominate
+            stream.enable_buffering(size=50)
+            with f:
+                stream.dump(f, encoding='utf-8')
             
-            print(f"✓ HTML report generated: {output_path}")
+            self._log.info("HTML report generated: %s", output_path)
             return output_path
             
         except Exception as e:
-            print(f"✗ Failed to generate HTML report: {e}")
+            self._log.error("Failed to generate HTML report: %s", e)
             return None
     
-    def generate_json_report(self, session_id: str, output_path: Path = None) -> Path:
+    def generate_json_report(self, session_id: str, output_path: Path = None, compress: bool = False,
+                             now: datetime = None, context: Dict[str, Any] = None) -> Path:
         """Generate machine-readable JSON report."""
+        now = now or datetime.now()
         if not output_path:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = now.strftime("%Y%m%d_%H%M%S")
             output_path = self.reports_dir / f"visual_test_report_{timestamp}.json"
         
-        # Get test results from database
-        test_results = self.get_session_results(session_id)
-        session_data = self.get_session_data(session_id)
+        context = context or self.load_context(session_id)
+        test_results = context["test_results"]
         
         # Prepare JSON data
         json_data = {
             "report_metadata": {
                 "session_id": session_id,
-                "generated_at": datetime.now().isoformat(),
+                "generated_at": now.isoformat(),
                 "test_env": self.test_env,
                 "report_version": "1.0"
             },
-            "session_data": session_data,
+            "session_data": context["session_data"],
             "performance_metrics": self.performance_metrics,
-            "test_results": [result.to_dict() for result in test_results],
-            "summary_stats": self.calculate_summary_stats(test_results),
-            "device_stats": self.calculate_device_stats(test_results),
-            "page_stats": self.calculate_page_stats(test_results),
-            "failure_analysis": self.analyze_failures(test_results)
+            "test_results": test_results,
+            "summary_stats": context["summary_stats"],
+            "device_stats": context["device_stats"],
+            "page_stats": context["page_stats"],
+            "failure_analysis": context["failure_analysis"]
         }
         
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2, ensure_ascii=False)
+            output_path, raw = self._open_report(output_path, compress)
+            if HAS_ORJSON:
+                # Encodes straight to UTF-8 bytes; TestResult dataclasses are serialized natively
+                with raw as f:
+                    f.write(orjson.dumps(json_data, option=orjson.OPT_INDENT_2))
+            else:
+                with io.TextIOWrapper(raw, encoding='utf-8') as f:
+                    json.dump(json_data, f, indent=2, ensure_ascii=False, default=_json_default)
             
-            print(f"✓ JSON report generated: {output_path}")
+            self._log.info("JSON report generated: %s", output_path)
             return output_path
             
         except Exception as e:
-            print(f"✗ Failed to generate JSON report: {e}")
+            self._log.error("Failed to generate JSON report: %s", e)
             return None
     
     def get_session_results(self, session_id: str) -> List[TestResult]:
         """Get all test results for a session."""
         results = []
+        self.flush_results()
         
         try:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT test_name, page_name, device, status, similarity, threshold,
-                       duration, screenshot_path, baseline_path, diff_path, 
-                       error_message, timestamp
-                FROM test_results 
-                WHERE test_session_id = ?
-                ORDER BY timestamp ASC
-            ''', (session_id,))
-            
-            for row in cursor.fetchall():
-                result = TestResult(
-                    test_name=row[0],
-                    page_name=row[1],
-                    device=row[2],
-                    status=row[3],
-                    similarity=row[4] or 0.0,
-                    threshold=row[5] or 95.0,
-                    duration=row[6] or 0.0,
-                    screenshot_path=row[7] or "",
-                    baseline_path=row[8] or "",
-                    diff_path=row[9] or "",
-                    error_message=row[10] or "",
-                    timestamp=row[11] or ""
-                )
-                results.append(result)
-            
-            conn.close()
+            with self._ro_lock:
+                cursor = self._ro_conn().cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(SELECT_RESULTS_SQL, (session_id,))
+                
+                while True:
+                    rows = cursor.fetchmany(1024)
+                    if not rows:
+                        break
+                    results.extend(TestResult(*row) for row in rows)
             
         except Exception as e:
-            print(f"⚠️ Failed to get session results: {e}")
+            self._log.warning("Failed to get session results: %s", e)
         
         return results
     
+    def get_session_failures(self, session_id: str) -> List[Dict[str, Any]]:
+        """Get the failed results of a session, filtered in SQL."""
+        self.flush_results()
+        
+        try:
+            with self._ro_lock:
+                cursor = self._ro_conn().cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(SELECT_FAILURES_SQL, (session_id,))
+                return [dict(row) for row in cursor]
+            
+        except Exception as e:
+            self._log.warning("Failed to get session failures: %s", e)
+            return []
+    
     def get_session_data(self, session_id: str) -> Dict[str, Any]:
         """Get session data from database."""
         try:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT test_env, started_at, ended_at, total_tests, passed_tests,
-                       failed_tests, error_tests, total_duration, avg_similarity, status
-                FROM test_sessions 
-                WHERE id = ?
-            ''', (session_id,))
-            
-            row = cursor.fetchone()
-            conn.close()
+            with self._ro_lock:
+                row = self._ro_conn().execute(SELECT_SESSION_SQL, (session_id,)).fetchone()
             
             if row:
                 return {
@@ -411,143 +656,196 @@ class VisualTestReporter:
                     "error_tests": row[6] or 0,
                     "total_duration": row[7] or 0.0,
                     "avg_similarity": row[8] or 0.0,
-                    "status": row[9] or "unknown"
+                    "status": row[9] or "unknown",
+                    "pass_rate": row[10],
+                    "ci_status": row[11]
                 }
             
         except Exception as e:
-            print(f"⚠️ Failed to get session data: {e}")
+            self._log.warning("Failed to get session data: %s", e)
         
         return {}
     
-    def calculate_summary_stats(self, test_results: List[TestResult]) -> Dict[str, Any]:
-        """Calculate summary statistics."""
-        if not test_results:
-            return {}
+    def _summary_stats_sql(self, session_id: str) -> Dict[str, Any]:
+        """Calculate summary statistics for a recorded session with a single SQL aggregate."""
+        self.flush_results()
         
-        total_tests = len(test_results)
-        passed_tests = sum(1 for r in test_results if r.status == "passed")
-        failed_tests = sum(1 for r in test_results if r.status == "failed")
-        error_tests = sum(1 for r in test_results if r.status == "error")
-        
-        similarities = [r.similarity for r in test_results if r.similarity > 0]
-        avg_similarity = sum(similarities) / len(similarities) if similarities else 0
+        try:
+            with self._ro_lock:
+                row = self._ro_conn().execute(SUMMARY_STATS_SQL, (session_id,)).fetchone()
+        except Exception as e:
+            self._log.warning("Failed to get summary stats: %s", e)
+            return {}
         
-        durations = [r.duration for r in test_results if r.duration > 0]
-        avg_duration = sum(durations) / len(durations) if durations else 0
+        total_tests, passed_tests, failed_tests, error_tests, avg_similarity, avg_duration, total_duration = row
+        if not total_tests:
+            return {}
         
         return {
             "total_tests": total_tests,
             "passed_tests": passed_tests,
             "failed_tests": failed_tests,
             "error_tests": error_tests,
-            "pass_rate": (passed_tests / total_tests) * 100 if total_tests > 0 else 0,
-            "avg_similarity": avg_similarity,
-            "avg_duration": avg_duration,
-            "total_duration": sum(durations)
+            "pass_rate": (passed_tests / total_tests) * 100,
+            "avg_similarity": avg_similarity or 0,
+            "avg_duration": avg_duration or 0,
+            "total_duration": total_duration or 0
         }
     
-    def calculate_device_stats(self, test_results: List[TestResult]) -> Dict[str, Any]:
-        """Calculate device-specific statistics."""
-        device_stats = {}
+    def _group_stats_sql(self, sql: str, session_id: str) -> Dict[str, Any]:
+        """Build grouped statistics (keyed by device or page) from a GROUP BY aggregate."""
+        self.flush_results()
         
-        for result in test_results:
-            device = result.device
-            if device not in device_stats:
-                device_stats[device] = {
-                    "total": 0,
-                    "passed": 0,
-                    "failed": 0,
-                    "error": 0,
-                    "similarities": [],
-                    "durations": []
-                }
-            
-            stats = device_stats[device]
-            stats["total"] += 1
-            
-            if result.status == "passed":
-                stats["passed"] += 1
-            elif result.status == "failed":
-                stats["failed"] += 1
-            else:
-                stats["error"] += 1
-            
-            if result.similarity > 0:
-                stats["similarities"].append(result.similarity)
-            
-            if result.duration > 0:
-                stats["durations"].append(result.duration)
+        try:
+            with self._ro_lock:
+                rows = self._ro_conn().execute(sql, (session_id,)).fetchall()
+        except Exception as e:
+            self._log.warning("Failed to get grouped stats: %s", e)
+            return {}
         
-        # Calculate averages
-        for device, stats in device_stats.items():
-            stats["pass_rate"] = (stats["passed"] / stats["total"]) * 100 if stats["total"] > 0 else 0
-            stats["avg_similarity"] = sum(stats["similarities"]) / len(stats["similarities"]) if stats["similarities"] else 0
-            stats["avg_duration"] = sum(stats["durations"]) / len(stats["durations"]) if stats["durations"] else 0
+        group_stats = {}
+        for key, total, passed, failed, avg_similarity, avg_duration in rows:
+            group_stats[key] = {
+                "total": total,
+                "passed": passed,
+                "failed": failed,
+                "error": total - passed - failed,
+                "pass_rate": (passed / total) * 100,
+                "avg_similarity": avg_similarity or 0,
+                "avg_duration": avg_duration or 0
+            }
         
-        return device_stats
+        return group_stats
     
-    def calculate_page_stats(self, test_results: List[TestResult]) -> Dict[str, Any]:
-        """Calculate page-specific statistics."""
-        page_stats = {}
+    def _device_stats_sql(self, session_id: str) -> Dict[str, Any]:
+        """Calculate device-specific statistics for a recorded session in SQL."""
+        return self._group_stats_sql(DEVICE_STATS_SQL, session_id)
+    
+    def _page_stats_sql(self, session_id: str) -> Dict[str, Any]:
+        """Calculate page-specific statistics for a recorded session in SQL."""
+        return self._group_stats_sql(PAGE_STATS_SQL, session_id)
+    
+    @staticmethod
+    def _accumulate_stats(test_results: List[TestResult], key) -> Dict[Any, Dict[str, Any]]:
+        """Group results by ``key(result)`` and keep running counts and sums per group.
+        
+        Averages are kept as running sums and counts so no per-attribute lists are built.
+        """
+        groups = defaultdict(lambda: {"total": 0, "passed": 0, "failed": 0, "error": 0,
+                                      "sim_sum": 0.0, "sim_n": 0, "dur_sum": 0.0, "dur_n": 0})
         
         for result in test_results:
-            page = result.page_name
-            if page not in page_stats:
-                page_stats[page] = {
-                    "total": 0,
-                    "passed": 0,
-                    "failed": 0,
-                    "error": 0,
-                    "similarities": [],
-                    "durations": []
-                }
-            
-            stats = page_stats[page]
+            stats = groups[key(result)]
             stats["total"] += 1
             
-            if result.status == "passed":
+            status = result.status
+            if status == "passed":
                 stats["passed"] += 1
-            elif result.status == "failed":
+            elif status == "failed":
                 stats["failed"] += 1
             else:
                 stats["error"] += 1
             
             if result.similarity > 0:
-                stats["similarities"].append(result.similarity)
-            
+                stats["sim_sum"] += result.similarity
+                stats["sim_n"] += 1
             if result.duration > 0:
-                stats["durations"].append(result.duration)
+                stats["dur_sum"] += result.duration
+                stats["dur_n"] += 1
+        
+        return groups
+    
+    @staticmethod
+    def _finalize_stats(stats: Dict[str, Any]) -> float:
+        """Replace a group's running sums with pass rate and averages; returns its total duration."""
+        sim_sum, sim_n = stats.pop("sim_sum"), stats.pop("sim_n")
+        dur_sum, dur_n = stats.pop("dur_sum"), stats.pop("dur_n")
+        stats["pass_rate"] = (stats["passed"] / stats["total"]) * 100 if stats["total"] > 0 else 0
+        stats["avg_similarity"] = sim_sum / sim_n if sim_n else 0
+        stats["avg_duration"] = dur_sum / dur_n if dur_n else 0
+        return dur_sum
+    
+    def _render_result_rows(self, test_results: List[TestResult]) -> str:
+        """Render the results-table rows in one Python pass instead of a template loop.
         
-        # Calculate averages
-        for page, stats in page_stats.items():
-            stats["pass_rate"] = (stats["passed"] / stats["total"]) * 100 if stats["total"] > 0 else 0
-            stats["avg_similarity"] = sum(stats["similarities"]) / len(stats["similarities"]) if stats["similarities"] else 0
-            stats["avg_duration"] = sum(stats["durations"]) / len(stats["durations"]) if stats["durations"] else 0
+        User-controlled fields are escaped here, since the template inserts the block as-is.
+        """
+        esc = html.escape
+        rows = []
+        for (test_name, page_name, device, status, similarity, duration,
+             timestamp, error_message, diff_path) in map(_RENDER_GETTER, test_results):
+            sim_css = "danger" if similarity < 90 else "warning" if similarity < 95 else ""
+            status = esc(status)
+            rows.append(
+                f'<tr class="expandable" onclick="toggleExpand(this)">'
+                f'<td>{esc(test_name)}</td><td>{esc(page_name)}</td><td>{esc(device)}</td>'
+                f'<td><span class="status-badge status-{status}">{status}</span></td>'
+                f'<td><div class="similarity-bar"><div class="similarity-fill {sim_css}" style="width: {similarity}%"></div>'
+                f'<div class="similarity-text">{similarity:.1f}%</div></div></td>'
+                f'<td>{duration:.2f}s</td><td>{esc(timestamp)}</td></tr>\n'
+            )
+            if error_message or diff_path:
+                details = ""
+                if error_message:
+                    details += f'<div><strong>Error:</strong> {esc(error_message)}</div>'
+                if diff_path:
+                    details += f'<div><strong>Diff Image:</strong> {esc(diff_path)}</div>'
+                rows.append(f'<tr><td colspan="7" class="expandable-content">{details}</td></tr>\n')
+        return "".join(rows)
+    
+    def calculate_summary_stats(self, test_results: List[TestResult]) -> Dict[str, Any]:
+        """Calculate summary statistics."""
+        if not test_results:
+            return {}
         
-        return page_stats
+        summary = self._accumulate_stats(test_results, lambda result: None)[None]
+        total_duration = self._finalize_stats(summary)
+        return {
+            "total_tests": summary["total"],
+            "passed_tests": summary["passed"],
+            "failed_tests": summary["failed"],
+            "error_tests": summary["error"],
+            "pass_rate": summary["pass_rate"],
+            "avg_similarity": summary["avg_similarity"],
+            "avg_duration": summary["avg_duration"],
+            "total_duration": total_duration
+        }
+    
+    def calculate_device_stats(self, test_results: List[TestResult]) -> Dict[str, Any]:
+        """Calculate device-specific statistics."""
+        device_stats = self._accumulate_stats(test_results, operator.attrgetter("device"))
+        for stats in device_stats.values():
+            self._finalize_stats(stats)
+        return dict(device_stats)
+    
+    def calculate_page_stats(self, test_results: List[TestResult]) -> Dict[str, Any]:
+        """Calculate page-specific statistics."""
+        page_stats = self._accumulate_stats(test_results, operator.attrgetter("page_name"))
+        for stats in page_stats.values():
+            self._finalize_stats(stats)
+        return dict(page_stats)
     
     def analyze_failures(self, test_results: List[TestResult]) -> Dict[str, Any]:
         """Analyze failure patterns."""
-        failures = [r for r in test_results if r.status == "failed"]
-        
-        if not failures:
-            return {"total_failures": 0, "patterns": []}
+        # Group failures by device and page and tally low similarities in one pass
+        device_failures = defaultdict(list)
+        page_failures = defaultdict(list)
+        total_failures = 0
+        low_sim_count = 0
+        low_sim_sum = 0.0
         
-        # Group failures by device
-        device_failures = {}
-        for failure in failures:
-            device = failure.device
-            if device not in device_failures:
-                device_failures[device] = []
-            device_failures[device].append(failure)
+        for result in test_results:
+            if result.status != "failed":
+                continue
+            total_failures += 1
+            device_failures[result.device].append(result)
+            page_failures[result.page_name].append(result)
+            if result.similarity < 85.0:
+                low_sim_count += 1
+                low_sim_sum += result.similarity
         
-        # Group failures by page
-        page_failures = {}
-        for failure in failures:
-            page = failure.page_name
-            if page not in page_failures:
-                page_failures[page] = []
-            page_failures[page].append(failure)
+        if not total_failures:
+            return {"total_failures": 0, "patterns": []}
         
         # Find common failure patterns
         patterns = []
@@ -564,25 +862,118 @@ class VisualTestReporter:
                 })
         
         # Low similarity patterns
-        low_similarity = [f for f in failures if f.similarity < 85.0]
-        if low_similarity:
+        if low_sim_count:
             patterns.append({
                 "type": "low_similarity",
-                "description": f"{len(low_similarity)} tests with very low similarity (<85%)",
-                "count": len(low_similarity),
-                "avg_similarity": sum(f.similarity for f in low_similarity) / len(low_similarity)
+                "description": f"{low_sim_count} tests with very low similarity (<85%)",
+                "count": low_sim_count,
+                "avg_similarity": low_sim_sum / low_sim_count
             })
         
         return {
-            "total_failures": len(failures),
-            "device_failures": device_failures,
-            "page_failures": page_failures,
+            "total_failures": total_failures,
+            "device_failures": dict(device_failures),
+            "page_failures": dict(page_failures),
             "patterns": patterns
         }
     
-    def get_html_template(self) -> str:
-        """Get HTML template for reports."""
-        return '''
+    def get_html_template(self) -> Template:
+        """Get the compiled HTML report template."""
+        return _HTML_TMPL
+    
+    def get_historical_data(self, days: int = 30) -> List[Dict[str, Any]]:
+        """Get historical test data for trend analysis."""
+        cutoff_date = datetime.now() - timedelta(days=days)
+        
+        try:
+            with self._ro_lock:
+                cursor = self._ro_conn().cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(SELECT_HISTORY_SQL, (cutoff_date.isoformat(),))
+                return [dict(row) for row in cursor]
+            
+        except Exception as e:
+            self._log.warning("Failed to get historical data: %s", e)
+            return []
+    
+    def get_daily_pass_rates(self, days: int = 30) -> List[Dict[str, Any]]:
+        """Get per-day pass rates over completed sessions, aggregated in SQL."""
+        cutoff_date = datetime.now() - timedelta(days=days)
+        
+        try:
+            with self._ro_lock:
+                cursor = self._ro_conn().cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(DAILY_PASS_RATES_SQL, (cutoff_date.isoformat(),))
+                return [dict(row) for row in cursor]
+            
+        except Exception as e:
+            self._log.warning("Failed to get daily pass rates: %s", e)
+            return []
+    
+    def export_ci_metrics(self, session_id: str, output_path: Path = None, now: datetime = None,
+                          compress: bool = False) -> Path:
+        """Export CI/CD compatible metrics, optionally as a zstd-compressed ``.zst`` file."""
+        if not output_path:
+            output_path = self.reports_dir / "ci_metrics.json"
+        if compress and not HAS_ZSTD:
+            self._log.warning("zstandard not installed, writing uncompressed CI metrics")
+            compress = False
+        
+        session_data = self.get_session_data(session_id)
+        total_tests = session_data.get("total_tests", 0)
+        passed_tests = session_data.get("passed_tests", 0)
+        failed_tests = session_data.get("failed_tests", 0)
+        ci_status = session_data.get("ci_status", "passed")
+        pass_rate = session_data.get("pass_rate", 0)
+        
+        # CI/CD friendly metrics
+        ci_metrics = {
+            "session_id": session_id,
+            "timestamp": now or datetime.now(),
+            "status": ci_status,
+            "total_tests": total_tests,
+            "passed_tests": passed_tests,
+            "failed_tests": failed_tests,
+            "error_tests": session_data.get("error_tests", 0),
+            "pass_rate": pass_rate,
+            "avg_similarity": session_data.get("avg_similarity", 0),
+            "total_duration": session_data.get("total_duration", 0),
+            "test_env": session_data.get("test_env", "unknown"),
+            "failures": self.get_session_failures(session_id)
+        }
+        
+        try:
+            if compress:
+                output_path = Path(output_path)
+                if output_path.suffix != '.zst':
+                    output_path = output_path.with_name(output_path.name + '.zst')
+                # Compressed artifacts are for upload, not reading, so skip the indentation
+                if HAS_ORJSON:
+                    payload = orjson.dumps(ci_metrics)
+                else:
+                    payload = json.dumps(ci_metrics, separators=(',', ':'), default=_json_default).encode('utf-8')
+                # Level 1 costs next to nothing and still shrinks JSON several times over
+                cctx = zstandard.ZstdCompressor(level=1)
+                with open(output_path, 'wb', buffering=1 << 20) as raw, cctx.stream_writer(raw) as f:
+                    f.write(payload)
+            else:
+                # One large buffer so the dump reaches the OS in a single write rather than many small ones
+                with open(output_path, 'wb', buffering=1 << 20) as f:
+                    if HAS_ORJSON:
+                        f.write(orjson.dumps(ci_metrics, option=orjson.OPT_INDENT_2))
+                    else:
+                        f.write(json.dumps(ci_metrics, indent=2, default=_json_default).encode('utf-8'))
+            
+            self._log.info("CI metrics exported: %s", output_path)
+            return output_path
+            
+        except Exception as e:
+            self._log.error("Failed to export CI metrics: %s", e)
+            return None
+
+
+_HTML_TEMPLATE_SRC = '''
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -784,15 +1175,15 @@ class VisualTestReporter:
                         <div class="metric-label">Total Tests</div>
                     </div>
                     <div class="metric-card {{ 'success' if summary_stats.pass_rate > 90 else 'warning' if summary_stats.pass_rate > 70 else 'danger' }}">
-                        <div class="metric-value">{{ "%.1f" | format(summary_stats.pass_rate) }}%</div>
+                        <div class="metric-value">{{ format_pct(summary_stats.pass_rate) }}%</div>
                         <div class="metric-label">Pass Rate</div>
                     </div>
                     <div class="metric-card">
-                        <div class="metric-value">{{ "%.1f" | format(summary_stats.avg_similarity) }}%</div>
+                        <div class="metric-value">{{ format_pct(summary_stats.avg_similarity) }}%</div>
                         <div class="metric-label">Avg Similarity</div>
                     </div>
                     <div class="metric-card">
-                        <div class="metric-value">{{ "%.1f" | format(summary_stats.avg_duration) }}s</div>
+                        <div class="metric-value">{{ format_pct(summary_stats.avg_duration) }}s</div>
                         <div class="metric-label">Avg Duration</div>
                     </div>
                 </div>
@@ -815,39 +1206,7 @@ class VisualTestReporter:
                             </tr>
                         </thead>
                         <tbody>
-                            {% for result in test_results %}
-                            <tr class="expandable" onclick="toggleExpand(this)">
-                                <td>{{ result.test_name }}</td>
-                                <td>{{ result.page_name }}</td>
-                                <td>{{ result.device }}</td>
-                                <td>
-                                    <span class="status-badge status-{{ result.status }}">
-                                        {{ result.status }}
-                                    </span>
-                                </td>
-                                <td>
-                                    <div class="similarity-bar">
-                                        <div class="similarity-fill {{ 'danger' if result.similarity < 90 else 'warning' if result.similarity < 95 else '' }}" 
-                                             style="width: {{ result.similarity }}%"></div>
-                                        <div class="similarity-text">{{ "%.1f" | format(result.similarity) }}%</div>
-                                    </div>
-                                </td>
-                                <td>{{ "%.2f" | format(result.duration) }}s</td>
-                                <td>{{ result.timestamp }}</td>
-                            </tr>
-                            {% if result.error_message or result.diff_path %}
-                            <tr>
-                                <td colspan="7" class="expandable-content">
-                                    {% if result.error_message %}
-                                    <div><strong>Error:</strong> {{ result.error_message }}</div>
-                                    {% endif %}
-                                    {% if result.diff_path %}
-                                    <div><strong>Diff Image:</strong> {{ result.diff_path }}</div>
-                                    {% endif %}
-                                </td>
-                            </tr>
-                            {% endif %}
-                            {% endfor %}
+                            {{ rows_html | safe }}
                         </tbody>
                     </table>
                 </div>
@@ -861,7 +1220,7 @@ class VisualTestReporter:
                     <div class="metric-card">
                         <div class="metric-value">{{ device }}</div>
                         <div class="metric-label">
-                            {{ stats.total }} tests, {{ "%.1f" | format(stats.pass_rate) }}% pass rate
+                            {{ stats.total }} tests, {{ format_pct(stats.pass_rate) }}% pass rate
                         </div>
                     </div>
                     {% endfor %}
@@ -912,110 +1271,20 @@ class VisualTestReporter:
 </body>
 </html>
         '''
-    
-    def get_json_template(self) -> str:
-        """Get JSON template structure."""
-        return '''
-{
-    "report_metadata": {
-        "session_id": "{{ session_id }}",
-        "generated_at": "{{ generated_at }}",
-        "test_env": "{{ test_env }}",
-        "report_version": "1.0"
-    },
-    "session_data": {{ session_data | tojson }},
-    "performance_metrics": {{ performance_metrics | tojson }},
-    "test_results": {{ test_results | tojson }},
-    "summary_stats": {{ summary_stats | tojson }},
-    "device_stats": {{ device_stats | tojson }},
-    "page_stats": {{ page_stats | tojson }},
-    "failure_analysis": {{ failure_analysis | tojson }}
-}
-        '''
-    
-    def get_historical_data(self, days: int = 30) -> List[Dict[str, Any]]:
-        """Get historical test data for trend analysis."""
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        try:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, test_env, started_at, ended_at, total_tests, 
-                       passed_tests, failed_tests, error_tests, 
-                       total_duration, avg_similarity, status
-                FROM test_sessions 
-                WHERE started_at > ? AND status = 'completed'
-                ORDER BY started_at DESC
-            ''', (cutoff_date.isoformat(),))
-            
-            sessions = []
-            for row in cursor.fetchall():
-                sessions.append({
-                    "id": row[0],
-                    "test_env": row[1],
-                    "started_at": row[2],
-                    "ended_at": row[3],
-                    "total_tests": row[4],
-                    "passed_tests": row[5],
-                    "failed_tests": row[6],
-                    "error_tests": row[7],
-                    "total_duration": row[8],
-                    "avg_similarity": row[9],
-                    "status": row[10]
-                })
-            
-            conn.close()
-            return sessions
-            
-        except Exception as e:
-            print(f"⚠️ Failed to get historical data: {e}")
-            return []
-    
-    def export_ci_metrics(self, session_id: str, output_path: Path = None) -> Path:
-        """Export CI/CD compatible metrics."""
-        if not output_path:
-            output_path = self.reports_dir / "ci_metrics.json"
-        
-        session_data = self.get_session_data(session_id)
-        test_results = self.get_session_results(session_id)
-        
-        # CI/CD friendly metrics
-        ci_metrics = {
-            "session_id": session_id,
-            "timestamp": datetime.now().isoformat(),
-            "status": "passed" if session_data.get("failed_tests", 0) == 0 else "failed",
-            "total_tests": session_data.get("total_tests", 0),
-            "passed_tests": session_data.get("passed_tests", 0),
-            "failed_tests": session_data.get("failed_tests", 0),
-            "error_tests": session_data.get("error_tests", 0),
-            "pass_rate": (session_data.get("passed_tests", 0) / session_data.get("total_tests", 1)) * 100,
-            "avg_similarity": session_data.get("avg_similarity", 0),
-            "total_duration": session_data.get("total_duration", 0),
-            "test_env": session_data.get("test_env", "unknown"),
-            "failures": [
-                {
-                    "test_name": r.test_name,
-                    "page_name": r.page_name,
-                    "device": r.device,
-                    "similarity": r.similarity,
-                    "error_message": r.error_message
-                }
-                for r in test_results if r.status == "failed"
-            ]
-        }
-        
-        try:
-            with open(output_path, 'w') as f:
-                json.dump(ci_metrics, f, indent=2)
-            
-            print(f"✓ CI metrics exported: {output_path}")
-            return output_path
-            
-        except Exception as e:
-            print(f"✗ Failed to export CI metrics: {e}")
-            return None
+
+
+# Report templates are compiled once at import and shared by every reporter. HTML output
+# carries user-controlled text, so it is escaped by default.
+_ENV = Environment(
+    loader=DictLoader({'report.html': _HTML_TEMPLATE_SRC}),
+    autoescape=select_autoescape(['html']),
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False,
+    cache_size=10
+)
+_ENV.globals['format_pct'] = lambda x: f"{x:.1f}"
+_HTML_TMPL = _ENV.get_template('report.html')
 
 
 def main():
@@ -1036,36 +1305,50 @@ def main():
     # Historical data
     hist_parser = subparsers.add_parser("history", help="Get historical data")
     hist_parser.add_argument("--days", type=int, default=30, help="Number of days")
+    hist_parser.add_argument("--daily", action="store_true", help="Show per-day pass rates instead of sessions")
     
     # CI metrics
     ci_parser = subparsers.add_parser("ci-metrics", help="Export CI metrics")
     ci_parser.add_argument("session_id", help="Test session ID")
     ci_parser.add_argument("--output", type=Path, help="Output file")
+    ci_parser.add_argument("--compress", action="store_true", help="Write zstd-compressed metrics (.zst)")
     
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     
     if not args.command:
         parser.print_help()
         return 1
     
     reporter = VisualTestReporter(args.env)
+    # One timestamp for everything this invocation writes
+    now = datetime.now()
     
     if args.command == "report":
+        # Read the session once and render every requested format from it
+        context = reporter.load_context(args.session_id)
+        
         if args.format in ["html", "both"]:
-            reporter.generate_html_report(args.session_id, args.output)
+            reporter.generate_html_report(args.session_id, args.output, now=now, context=context)
         
         if args.format in ["json", "both"]:
-            reporter.generate_json_report(args.session_id, args.output)
+            reporter.generate_json_report(args.session_id, args.output, now=now, context=context)
         
         return 0
     
     elif args.command == "history":
-        history = reporter.get_historical_data(args.days)
-        print(json.dumps(history, indent=2))
+        if args.daily:
+            history = reporter.get_daily_pass_rates(args.days)
+        else:
+            history = reporter.get_historical_data(args.days)
+        if HAS_ORJSON:
+            print(orjson.dumps(history, option=orjson.OPT_INDENT_2).decode())
+        else:
+            print(json.dumps(history, indent=2))
         return 0
     
     elif args.command == "ci-metrics":
-        reporter.export_ci_metrics(args.session_id, args.output)
+        reporter.export_ci_metrics(args.session_id, args.output, now=now, compress=args.compress)
         return 0
     
     else: